@@ -4,15 +4,28 @@ Main Streamlit application entry point.
 """
 import streamlit as st
 
-from config.settings import PAGE_TITLE, PAGE_LAYOUT
-from src.utils.session import initialize_session_state
+from config.settings import PAGE_TITLE, PAGE_LAYOUT, TRACE_METRICS_PORT, SNAPSHOT_AUTOLOAD
+from src.utils.session import (
+    autoload_snapshot,
+    initialize_session_state,
+    resume_interrupted_jobs,
+    reset_conversation,
+    set_document_chunks,
+    sync_evicted_sources
+)
 from src.models.loader import load_all_models
+from src.vectorstore.chroma_manager import load_library, library_generation
 from src.ui.sidebar import render_sidebar
 from src.ui.chat import render_chat_interface
+from src.utils.tracing import start_metrics_server
 
 # Configure Streamlit page
 st.set_page_config(page_title=PAGE_TITLE, layout=PAGE_LAYOUT)
 
+# Expose /metrics and /spans locally when a port is configured
+if TRACE_METRICS_PORT:
+    start_metrics_server(TRACE_METRICS_PORT)
+
 # Initialize session state
 initialize_session_state()
 
@@ -22,9 +35,36 @@ if st.session_state.llm is None:
         st.session_state.embeddings_model, st.session_state.llm = load_all_models()
         
         if st.session_state.llm:
-            st.session_state.messages = [
-                {"role": "assistant", "content": "Models loaded! Upload or link a document to begin."}
-            ]
+            reset_conversation("Models loaded! Upload or link a document to begin.")
+
+# Jobs interrupted by a restart have no session left to resume them
+if st.session_state.embeddings_model:
+    resume_interrupted_jobs(st.session_state.embeddings_model)
+
+# Another session reset or replaced the library: drop the stale handle and reload
+if st.session_state.library_loaded and st.session_state.library_generation != library_generation():
+    st.session_state.library_loaded = False
+    st.session_state.vectorstore = None
+    st.session_state.retrieval_scope = None
+    set_document_chunks([])
+
+# Reopen the persistent library so chat works against already-indexed content
+if st.session_state.embeddings_model and not st.session_state.library_loaded:
+    st.session_state.library_loaded = True
+    if SNAPSHOT_AUTOLOAD:
+        # Fresh instance: bootstrap the library from a snapshot instead of re-ingesting
+        with st.spinner("Loading index snapshot..."):
+            autoload_error = autoload_snapshot(st.session_state.embeddings_model)
+        if autoload_error:
+            st.error(f"Snapshot autoload failed: {autoload_error}")
+    st.session_state.library_generation = library_generation()
+    vector_store, chunks = load_library(st.session_state.embeddings_model)
+    if vector_store:
+        st.session_state.vectorstore = vector_store
+        set_document_chunks(chunks)
+
+# Drop sources the background index maintenance evicted
+sync_evicted_sources()
 
 # Render UI
 render_sidebar()
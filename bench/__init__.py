@@ -0,0 +1 @@
+"""Offline benchmarks for Intellicite hot paths."""
@@ -0,0 +1,85 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Usage:
+    python -m bench.compare baseline.json candidate.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = ("per_sec", "qps")
+IGNORED = ("count", "size", "documents", "chars", "chunks", "pages", "clients", "timestamp")
+
+
+def flatten(value, prefix=""):
+    """Flatten nested results into {path: number}, keying list items by kind/size."""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = index
+            if isinstance(item, dict):
+                parts = [str(item[k]) for k in ("kind", "size", "clients", "pages") if k in item]
+                label = "/".join(parts) or index
+            flat.update(flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = float(value)
+    return flat
+
+
+def compare(baseline, candidate, threshold):
+    """
+    Compare two result payloads.
+
+    Returns:
+        List of (metric, baseline, candidate, change %, regressed)
+    """
+    base = flatten(baseline.get("results", baseline))
+    cand = flatten(candidate.get("results", candidate))
+    rows = []
+    for metric in sorted(base.keys() & cand.keys()):
+        leaf = metric.rsplit(".", 1)[-1]
+        if leaf in IGNORED or metric.startswith("config"):
+            continue
+        old, new = base[metric], cand[metric]
+        if old == 0:
+            continue
+        change = (new - old) / old * 100
+        higher_better = any(tag in leaf for tag in HIGHER_IS_BETTER)
+        regressed = change < -threshold if higher_better else change > threshold
+        rows.append((metric, old, new, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent")
+    parser.add_argument("--only-regressions", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.threshold)
+    regressions = [r for r in rows if r[4]]
+    for metric, old, new, change, regressed in rows:
+        if args.only_regressions and not regressed:
+            continue
+        flag = "REGRESSION" if regressed else ""
+        print(f"{metric:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1f}% {flag}")
+
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0f}% "
+          f"({baseline.get('git_revision', '?')} -> {candidate.get('git_revision', '?')})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
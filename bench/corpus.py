@@ -0,0 +1,230 @@
+"""
+Deterministic synthetic corpora shaped like the application's inputs.
+
+- "pdf": one Document per page, as PyPDFLoader produces, spread over
+  several manuals so source-scoped queries have something to narrow
+- "html": raw HTML pages, converted with the web loader's text extraction
+- "transcript": one long Document per video, as YoutubeLoader produces
+
+write_pdf/pdf_fixture also render pages into real PDF files for the
+extraction benchmark.
+"""
+import random
+
+from langchain_core.documents import Document
+
+from src.document_processing.loaders import html_to_text
+
+SYLLABLES = [
+    "ka", "lo", "mi", "ne", "ra", "tu", "ve", "shi", "do", "pra",
+    "gen", "tor", "lux", "bri", "sta", "que", "zen", "mor", "fal", "tri",
+]
+CORPUS_KINDS = ("pdf", "html", "transcript")
+PAGES_PER_MANUAL = 20
+
+
+def make_vocabulary(size=5000, seed=7):
+    """Build a stable vocabulary of pseudo-words."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def _sentence(rng, vocabulary):
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(8, 22))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng, vocabulary):
+    return " ".join(_sentence(rng, vocabulary) for _ in range(rng.randint(3, 7)))
+
+
+def pdf_pages(n_pages, rng, vocabulary, source="bench/manual.pdf"):
+    """Pages of a PDF manual: ~2.5k characters each."""
+    docs = []
+    for page in range(n_pages):
+        text = "\n".join(_paragraph(rng, vocabulary) for _ in range(4))
+        docs.append(Document(page_content=text, metadata={"source": source, "page": page}))
+    return docs
+
+
+def pdf_manuals(n_pages, rng, vocabulary, pages_per_manual=PAGES_PER_MANUAL):
+    """Pages of several PDF manuals, each its own source with pages numbered from 0."""
+    docs = []
+    for start in range(0, n_pages, pages_per_manual):
+        source = f"bench/manual_{start // pages_per_manual:03d}.pdf"
+        docs.extend(pdf_pages(min(pages_per_manual, n_pages - start), rng, vocabulary, source=source))
+    return docs
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages, line_chars=90):
+    """
+    Write a minimal text-only PDF (Helvetica, one content stream per page).
+
+    Args:
+        path: Output file path
+        pages: List of page texts
+        line_chars: Characters per rendered line
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for text in pages:
+        words, lines, line = text.split(), [], ""
+        for word in words:
+            if line and len(line) + len(word) + 1 > line_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+        stream = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(
+            f"({_pdf_escape(l)}) '" for l in lines
+        ) + " ET"
+        stream = stream.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def pdf_fixture(path, n_pages, seed=7):
+    """Write a synthetic manual of n_pages to path and return the page texts."""
+    rng = random.Random(seed)
+    pages = [doc.page_content for doc in pdf_pages(n_pages, rng, make_vocabulary())]
+    write_pdf(path, pages)
+    return pages
+
+
+def html_pages(n_pages, rng, vocabulary):
+    """Raw HTML pages with navigation, scripts and styles around the content."""
+    pages = []
+    for i in range(n_pages):
+        body = "".join(f"<p>{_paragraph(rng, vocabulary)}</p>\n" for _ in range(5))
+        pages.append(
+            "<html><head><title>Page {i}</title><style>p {{ margin: 0 }}</style>"
+            "<script>var tracking = {i};</script></head><body>"
+            "<nav><a href='/'>Home</a> <a href='/docs'>Docs</a></nav>"
+            "<h1>Section {i}</h1>\n{body}<footer>Copyright</footer></body></html>".format(i=i, body=body)
+        )
+    return pages
+
+
+def transcripts(n_videos, rng, vocabulary, minutes=20):
+    """Video transcripts: short caption lines joined into one document each."""
+    docs = []
+    for video in range(n_videos):
+        lines = [
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 12)))
+            for _ in range(minutes * 15)
+        ]
+        docs.append(Document(
+            page_content=" ".join(lines),
+            metadata={"source": f"https://www.youtube.com/watch?v=bench{video:06d}"}
+        ))
+    return docs
+
+
+def generate_corpus(kind, size, seed=7):
+    """
+    Generate a synthetic corpus.
+
+    Args:
+        kind: One of CORPUS_KINDS
+        size: Number of pages (pdf/html) or videos (transcript); pdf pages
+            are split into manuals of PAGES_PER_MANUAL pages
+        seed: Random seed
+
+    Returns:
+        List of Document objects ready for splitting
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(seed=seed)
+    if kind == "pdf":
+        return pdf_manuals(size, rng, vocabulary)
+    if kind == "html":
+        return [
+            Document(page_content=html_to_text(page), metadata={"source": f"https://bench.local/page/{i}"})
+            for i, page in enumerate(html_pages(size, rng, vocabulary))
+        ]
+    if kind == "transcript":
+        return transcripts(size, rng, vocabulary)
+    raise ValueError(f"Unknown corpus kind: {kind}")
+
+
+def generate_queries(n, seed=11):
+    """Generate keyword-style queries drawn from the corpus vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary()
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 6))) for _ in range(n)]
+
+
+FACT_ATTRIBUTES = ["calibration code", "firmware revision", "service interval", "rated voltage", "owner team"]
+
+
+def generate_labelled_corpus(n_pages, n_facts, seed=13):
+    """
+    Generate PDF-style pages with injected facts and matching questions.
+
+    Each fact ("The calibration code of device X is Q-1234.") is planted on
+    one page, with distractor sentences mentioning the same device on other
+    pages. Relevance is judged by whether a retrieved chunk contains the
+    answer string, so labels stay valid for any chunking settings.
+
+    Args:
+        n_pages: Number of pages
+        n_facts: Number of labelled facts/questions
+        seed: Random seed
+
+    Returns:
+        tuple: (documents, questions) where questions are dicts with
+        "question" and "answer"
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(seed=seed)
+    docs = pdf_pages(n_pages, rng, vocabulary, source="bench/labelled.pdf")
+    devices = rng.sample(vocabulary, n_facts)
+
+    questions = []
+    for i, device in enumerate(devices):
+        attribute = FACT_ATTRIBUTES[i % len(FACT_ATTRIBUTES)]
+        answer = f"Q-{rng.randint(1000, 9999)}-{i}"
+        _plant(rng.choice(docs), f"The {attribute} of device {device} is {answer}.", rng)
+        for _ in range(2):
+            distractor = rng.choice(FACT_ATTRIBUTES)
+            _plant(rng.choice(docs), f"Device {device} is listed in the {distractor} appendix.", rng)
+        questions.append({"question": f"What is the {attribute} of device {device}?", "answer": answer})
+    return docs, questions
+
+
+def _plant(doc, sentence, rng):
+    """Insert a sentence between two paragraphs of a page."""
+    paragraphs = doc.page_content.split("\n")
+    paragraphs.insert(rng.randint(0, len(paragraphs)), sentence)
+    doc.page_content = "\n".join(paragraphs)
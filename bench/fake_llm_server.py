@@ -0,0 +1,203 @@
+"""
+Local fake of the Groq chat completions API for offline load testing.
+
+Serves POST /openai/v1/chat/completions (streaming and non-streaming) with
+configurable latency, a server-side request rate limit and random 429s, and
+counts the upstream calls it receives.
+
+Usage:
+    python -m bench.fake_llm_server --port 8765 --latency-ms 300 --rps 5
+    # then point ChatGroq at base_url="http://127.0.0.1:8765"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.models.gateway import TokenBucket
+
+
+class FakeLLMServer:
+    """
+    Threaded fake LLM server.
+
+    Args:
+        port: Port to bind (0 picks a free port)
+        latency_ms: Total response time per request
+        ttft_ms: Time to first streamed token
+        rps: Requests per second allowed before answering 429 (0 = unlimited)
+        error_rate: Probability of a random 429 regardless of load
+        answer: Text returned for every request
+    """
+
+    def __init__(self, port=0, latency_ms=200.0, ttft_ms=50.0, rps=0.0, error_rate=0.0,
+                 answer="This is a fake answer from the local test server."):
+        self.latency = latency_ms / 1000.0
+        self.ttft = min(ttft_ms, latency_ms) / 1000.0
+        self.limiter = TokenBucket(rps, max(1.0, rps)) if rps else None
+        self.error_rate = error_rate
+        self.answer = answer
+        self.stats = {"requests": 0, "rate_limited": 0, "completed": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _admit(self):
+        """Decide whether a request is served or rejected with 429."""
+        if self.error_rate and random.random() < self.error_rate:
+            return False
+        if self.limiter is None:
+            return True
+        with self.limiter._lock:
+            self.limiter._refill()
+            if self.limiter._tokens >= 1:
+                self.limiter._tokens -= 1
+                return True
+        return False
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                server._count("requests")
+
+                if not server._admit():
+                    server._count("rate_limited")
+                    self._send_json(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                        headers={"retry-after": "0.2"}
+                    )
+                    return
+
+                prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+                usage = {
+                    "prompt_tokens": max(1, len(prompt) // 4),
+                    "completion_tokens": max(1, len(server.answer) // 4),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                model = request.get("model", "fake-model")
+
+                if request.get("stream"):
+                    self._stream(model, usage)
+                else:
+                    time.sleep(server.latency)
+                    self._send_json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": server.answer},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": usage,
+                    })
+                server._count("completed")
+
+            def _stream(self, model, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                words = server.answer.split(" ")
+                per_word = (server.latency - server.ttft) / max(1, len(words))
+                time.sleep(server.ttft)
+                for i, word in enumerate(words):
+                    self._event({
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"role": "assistant", "content": word if i == 0 else " " + word},
+                            "finish_reason": None,
+                        }],
+                    })
+                    time.sleep(per_word)
+                self._event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "x_groq": {"id": completion_id, "usage": usage},
+                })
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--ttft-ms", type=float, default=80.0)
+    parser.add_argument("--rps", type=float, default=0.0, help="Server-side limit; 0 disables")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Random 429 probability")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.port, args.latency_ms, args.ttft_ms, args.rps, args.error_rate).start()
+    print(f"Fake LLM server listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(server.stats)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
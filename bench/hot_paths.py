@@ -0,0 +1,210 @@
+"""
+Reproducible benchmark of the ingest and retrieval hot paths.
+
+Runs fully offline on synthetic corpora (PDF pages, HTML pages, transcripts)
+with stub embeddings and a stub LLM in place of ChatGroq, and writes the
+results as JSON so runs can be compared between commits with bench.compare.
+
+Usage:
+    python -m bench.hot_paths [--sizes 50 200 1000] [--kinds pdf html transcript]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import uuid
+
+from langchain_community.vectorstores import Chroma
+
+from bench.corpus import CORPUS_KINDS, generate_corpus, generate_queries, html_pages, make_vocabulary
+from bench.stats import latency_summary, write_results
+from bench.stubs import PrecomputedEmbeddings, StubChatModel, load_embeddings
+from config.settings import RETRIEVER_K
+from src.document_processing.loaders import html_to_text
+from src.document_processing.processor import split_documents
+from src.rag.chain import create_hybrid_retriever, create_rag_chain
+from src.rag.keyword_index import PartitionedBM25Index
+from src.rag.scope import RetrievalScope
+from src.utils.tracing import tracer
+
+EMBED_BATCH_SIZE = 64
+
+
+def timed(func, *args, **kwargs):
+    """Run func and return (result, elapsed seconds)."""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def peak_memory_mb(func, *args, **kwargs):
+    """Run func under tracemalloc and return its peak Python allocation in MB."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def query_latencies(func, queries):
+    """Call func for every query and summarise the latencies."""
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        func(query)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+def embed_all(embeddings, texts):
+    """Embed texts in ingestion-sized batches."""
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        vectors.extend(embeddings.embed_documents(texts[i:i + EMBED_BATCH_SIZE]))
+    return vectors
+
+
+def bench_html_parse(size):
+    """Throughput of the web loader's HTML-to-text extraction."""
+    import random
+
+    pages = html_pages(size, random.Random(7), make_vocabulary())
+    total_bytes = sum(len(p) for p in pages)
+    _, elapsed = timed(lambda: [html_to_text(p) for p in pages])
+    return {
+        "pages": size,
+        "pages_per_sec": size / elapsed,
+        "mb_per_sec": total_bytes / (1024 * 1024) / elapsed,
+    }
+
+
+def bench_corpus(kind, size, embeddings, queries, measure_memory, llm_latency_ms):
+    """
+    Benchmark split, embed, upsert, BM25 and hybrid retrieval for one corpus.
+    Scoped queries search the first tenth of the corpus' sources.
+
+    Returns:
+        dict of metrics for this corpus
+    """
+    docs = generate_corpus(kind, size)
+    corpus_chars = sum(len(d.page_content) for d in docs)
+    result = {"kind": kind, "size": size, "documents": len(docs), "chars": corpus_chars}
+
+    # Splitting
+    chunks, elapsed = timed(split_documents, docs)
+    result["split"] = {
+        "chunks": len(chunks),
+        "chunks_per_sec": len(chunks) / elapsed,
+        "mb_per_sec": corpus_chars / (1024 * 1024) / elapsed,
+        "seconds": elapsed,
+    }
+
+    # Embedding
+    texts = [c.page_content for c in chunks]
+    vectors, elapsed = timed(embed_all, embeddings, texts)
+    result["embed"] = {"chunks_per_sec": len(texts) / elapsed, "seconds": elapsed}
+
+    # Chroma upsert with precomputed vectors, so only the store is timed
+    precomputed = PrecomputedEmbeddings(dict(zip(texts, vectors)), embeddings)
+    collection_name = f"bench_{uuid.uuid4().hex[:12]}"
+    vector_store, elapsed = timed(
+        Chroma.from_documents,
+        documents=chunks,
+        embedding=precomputed,
+        collection_name=collection_name
+    )
+    result["upsert"] = {"chunks_per_sec": len(chunks) / elapsed, "seconds": elapsed}
+
+    try:
+        # BM25 build and query
+        index, elapsed = timed(PartitionedBM25Index, chunks)
+        result["bm25"] = {
+            "build_seconds": elapsed,
+            "query": query_latencies(lambda q: index.search(q, k=RETRIEVER_K), queries),
+        }
+
+        sources = index.sources()
+        scope = RetrievalScope(sources=sources[:max(1, len(sources) // 10)])
+        result["bm25_scoped"] = {
+            "sources": len(scope.sources),
+            "of_sources": len(sources),
+            "chunks": len(index.documents(scope.sources)),
+            "query": query_latencies(lambda q: index.search(q, k=RETRIEVER_K, scope=scope), queries),
+        }
+
+        # Vector search alone and the full hybrid retriever
+        semantic = vector_store.as_retriever(search_kwargs={"k": RETRIEVER_K})
+        result["vector_search"] = {"query": query_latencies(semantic.invoke, queries)}
+
+        hybrid = create_hybrid_retriever(vector_store, chunks, keyword_index=index)
+        result["hybrid"] = {"query": query_latencies(hybrid.invoke, queries)}
+
+        hybrid_scoped = create_hybrid_retriever(vector_store, chunks, keyword_index=index, scope=scope)
+        result["hybrid_scoped"] = {"query": query_latencies(hybrid_scoped.invoke, queries)}
+
+        # End-to-end chain with a stub LLM
+        llm = StubChatModel(latency_ms=llm_latency_ms)
+        chain = create_rag_chain(vector_store, llm, "Helpful Assistant", documents=chunks)
+        result["chain"] = {"query": query_latencies(chain.invoke, queries)}
+
+        if measure_memory:
+            result["memory_peak_mb"] = {
+                "split": peak_memory_mb(split_documents, docs),
+                "bm25_build": peak_memory_mb(PartitionedBM25Index, chunks),
+                "hybrid_query": peak_memory_mb(lambda: [hybrid.invoke(q) for q in queries[:20]]),
+            }
+    finally:
+        vector_store.delete_collection()
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000],
+                        help="Corpus sizes in pages (transcripts use size/10 videos)")
+    parser.add_argument("--kinds", nargs="+", choices=CORPUS_KINDS, default=list(CORPUS_KINDS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc passes")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    # Keep the benchmark from writing spans to the local trace export
+    tracer.export_path = None
+
+    embeddings = load_embeddings(args.embeddings, call_overhead_ms=0.0, per_text_ms=0.0)
+    queries = generate_queries(args.queries)
+
+    results = {
+        "config": vars(args),
+        "html_parse": [bench_html_parse(size) for size in args.sizes],
+        "corpora": [],
+    }
+    for kind in args.kinds:
+        for size in args.sizes:
+            corpus_size = max(1, size // 10) if kind == "transcript" else size
+            row = bench_corpus(kind, corpus_size, embeddings, queries,
+                               not args.no_memory, args.llm_latency_ms)
+            results["corpora"].append(row)
+            print(
+                f"{kind:<10} size={corpus_size:<5} chunks={row['split']['chunks']:<6} "
+                f"split={row['split']['chunks_per_sec']:.0f}/s "
+                f"embed={row['embed']['chunks_per_sec']:.0f}/s "
+                f"upsert={row['upsert']['chunks_per_sec']:.0f}/s "
+                f"bm25 p50={row['bm25']['query']['p50_ms']:.2f}ms "
+                f"scoped={row['bm25_scoped']['query']['p50_ms']:.2f}ms "
+                f"hybrid p50={row['hybrid']['query']['p50_ms']:.2f}ms "
+                f"p99={row['hybrid']['query']['p99_ms']:.2f}ms"
+            )
+
+    path = write_results("hot_paths", results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
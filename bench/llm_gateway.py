@@ -0,0 +1,114 @@
+"""
+Load test of the LLM gateway against the local fake LLM server.
+
+Fires concurrent clients at ChatGroq pointed at FakeLLMServer, once directly
+and once through LLMGateway, with a share of identical prompts. Reports
+success rate, upstream calls, 429s and latency for each mode.
+
+Usage:
+    python -m bench.llm_gateway [--clients 32] [--requests 4] [--duplicate-share 0.5]
+"""
+import argparse
+import random
+import threading
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_groq import ChatGroq
+
+from bench.fake_llm_server import FakeLLMServer
+from bench.stats import latency_summary, write_results
+from src.models.gateway import LLMGateway
+
+
+def run_load(model, clients, requests_per_client, duplicate_share, stream):
+    """
+    Run concurrent clients against a chat model.
+
+    Returns:
+        dict with successes, failures and latency summary
+    """
+    latencies, failures = [], []
+    lock = threading.Lock()
+    rng = random.Random(3)
+    prompts = [
+        "Summarise the shared context." if rng.random() < duplicate_share else f"Unique question {i}"
+        for i in range(clients * requests_per_client)
+    ]
+
+    def client(client_id):
+        for i in range(requests_per_client):
+            prompt = prompts[client_id * requests_per_client + i]
+            started = time.perf_counter()
+            try:
+                if stream:
+                    "".join(chunk.content for chunk in model.stream([HumanMessage(content=prompt)]))
+                else:
+                    model.invoke([HumanMessage(content=prompt)])
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    failures.append(type(e).__name__)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        "successes": len(latencies),
+        "failures": len(failures),
+        "failure_types": sorted(set(failures)),
+        "wall_seconds": time.perf_counter() - started,
+        **latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--duplicate-share", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--server-rps", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--stream", action="store_true", help="Use streaming requests")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {"config": vars(args)}
+    for mode in ("direct", "gateway"):
+        server = FakeLLMServer(
+            latency_ms=args.latency_ms,
+            rps=args.server_rps,
+            error_rate=args.error_rate
+        ).start()
+        try:
+            llm = ChatGroq(api_key="fake-key", model="fake-model", base_url=server.base_url, max_retries=0)
+            if mode == "gateway":
+                llm = LLMGateway(
+                    llm,
+                    requests_per_minute=args.server_rps * 60,
+                    tokens_per_minute=1_000_000,
+                    max_concurrency=8,
+                    retry_base_delay=0.1
+                )
+            row = run_load(llm, args.clients, args.requests, args.duplicate_share, args.stream)
+            row["upstream"] = dict(server.stats)
+        finally:
+            server.stop()
+
+        results[mode] = row
+        print(f"{mode:<8} ok={row['successes']:<4} failed={row['failures']:<4} "
+              f"upstream={row['upstream']['requests']:<4} 429s={row['upstream']['rate_limited']:<4} "
+              f"p50={row['p50_ms']:.0f}ms p99={row['p99_ms']:.0f}ms")
+
+    path = write_results("llm_gateway", results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
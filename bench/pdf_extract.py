@@ -0,0 +1,131 @@
+"""
+PDF extraction throughput and memory per backend and worker count.
+
+Writes synthetic fixture PDFs, then extracts each one in a fresh Python
+process per configuration so peak RSS is not shared between runs. Reports
+pages/sec for the first (cold pool) and later (warm pool) extractions,
+peak RSS of the parent and of each pool worker.
+
+Usage:
+    python -m bench.pdf_extract [--pages 100 500] [--workers 1 2 4] [--backends pypdf pymupdf]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.corpus import pdf_fixture
+from bench.stats import write_results
+
+ROOT = Path(__file__).parent.parent
+
+
+def peak_rss_mb(pid="self"):
+    """Peak resident set size (VmHWM) of a process in MB, Linux only."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == "self":
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def run_config(path, backend, workers, repeats):
+    """Measure one configuration in this process and return its metrics."""
+    from src.document_processing import pdf_engine
+    from src.utils.tracing import tracer
+
+    tracer.export_path = None
+    timings = []
+    pages = 0
+    for _ in range(repeats + 1):
+        started = time.perf_counter()
+        docs = pdf_engine.extract_pdf(path, backend=backend, workers=workers)
+        timings.append(time.perf_counter() - started)
+        pages = len(docs)
+
+    pool = pdf_engine._pool
+    worker_rss = [peak_rss_mb(pid) for pid in (pool._processes if pool else {})]
+    pdf_engine.shutdown_pool()
+
+    warm = timings[1:] or timings
+    return {
+        "backend": backend,
+        "workers": workers,
+        "pages": pages,
+        "cold_seconds": timings[0],
+        "cold_pages_per_sec": pages / timings[0],
+        "warm_pages_per_sec": pages / (sum(warm) / len(warm)),
+        "parent_peak_rss_mb": peak_rss_mb(),
+        "worker_peak_rss_mb": max((r for r in worker_rss if r is not None), default=None),
+    }
+
+
+def measure_isolated(path, backend, workers, repeats):
+    """Run run_config in a fresh interpreter and return its metrics."""
+    output = subprocess.run(
+        [sys.executable, "-m", "bench.pdf_extract", "--child",
+         json.dumps({"path": str(path), "backend": backend, "workers": workers, "repeats": repeats})],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help="Defaults to every installed backend")
+    parser.add_argument("--repeats", type=int, default=2, help="Warm runs after the first")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if args.child:
+        config = json.loads(args.child)
+        print(json.dumps(run_config(config["path"], config["backend"], config["workers"], config["repeats"])))
+        return
+
+    from src.document_processing.pdf_engine import HAS_PYMUPDF
+
+    backends = args.backends or (["pypdf", "pymupdf"] if HAS_PYMUPDF else ["pypdf"])
+    results = {"config": vars(args), "cpus": os.cpu_count(), "runs": []}
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        for n_pages in args.pages:
+            path = Path(fixture_dir) / f"manual_{n_pages}.pdf"
+            pdf_fixture(path, n_pages)
+            size_mb = path.stat().st_size / (1024 * 1024)
+
+            for backend in backends:
+                for workers in args.workers:
+                    row = measure_isolated(path, backend, workers, args.repeats)
+                    row["file_mb"] = size_mb
+                    results["runs"].append(row)
+                    worker_rss = row["worker_peak_rss_mb"]
+                    print(
+                        f"pages={n_pages:<5} backend={backend:<8} workers={workers:<2} "
+                        f"cold={row['cold_pages_per_sec']:.0f}/s warm={row['warm_pages_per_sec']:.0f}/s "
+                        f"rss={row['parent_peak_rss_mb']:.0f}MB "
+                        f"worker_rss={'-' if worker_rss is None else f'{worker_rss:.0f}MB'}"
+                    )
+
+    path = write_results("pdf_extract", results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
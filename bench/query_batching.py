@@ -0,0 +1,91 @@
+"""
+Load benchmark for query-embedding micro-batching.
+
+Runs N concurrent clients that embed queries back to back, once against the
+raw embedding model and once through BatchedQueryEmbeddings, and reports
+throughput and p50/p99 latency per concurrency level.
+
+Usage:
+    python -m bench.query_batching [--embeddings stub|hf] [--duration 5]
+"""
+import argparse
+import threading
+import time
+
+from bench.stats import latency_summary, write_results
+from bench.stubs import load_embeddings
+from src.models.embeddings import BatchedQueryEmbeddings
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16, 32, 64]
+
+
+def run_clients(embeddings, clients, duration):
+    """
+    Run concurrent clients against an embeddings object for a fixed duration.
+
+    Args:
+        embeddings: Object exposing embed_query
+        clients: Number of concurrent client threads
+        duration: Run time in seconds
+
+    Returns:
+        dict with throughput (queries/sec) and latency summary
+    """
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(client_id):
+        i = 0
+        local = []
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            embeddings.embed_query(f"client {client_id} question {i} about the document")
+            local.append(time.perf_counter() - started)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "clients": clients,
+        "throughput_qps": len(latencies) / elapsed if elapsed else 0.0,
+        **latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--wait-ms", type=float, default=None, help="Override batch wait window")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    model = load_embeddings(args.embeddings)
+    batcher_kwargs = {} if args.wait_ms is None else {"max_wait_ms": args.wait_ms}
+    batched = BatchedQueryEmbeddings(model, **batcher_kwargs)
+
+    results = {"embeddings": args.embeddings, "direct": [], "batched": []}
+    print(f"{'mode':<8} {'clients':>7} {'qps':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for clients in args.concurrency:
+        for mode, target in (("direct", model), ("batched", batched)):
+            row = run_clients(target, clients, args.duration)
+            results[mode].append(row)
+            print(f"{mode:<8} {clients:>7} {row['throughput_qps']:>9.1f} "
+                  f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+
+    path = write_results("query_batching", results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
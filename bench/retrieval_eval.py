@@ -0,0 +1,213 @@
+"""
+Retrieval quality and cost evaluation across chunking and retrieval settings.
+
+Builds an index per (chunk size, overlap) pair, runs a labelled question set
+through the hybrid retriever for every (k, semantic weight) combination and
+reports recall@k, MRR, prompt tokens and latency, plus the Pareto front of
+quality against latency and tokens.
+
+A question counts as answered at rank r if the r-th retrieved chunk contains
+its answer string. Without --dataset a synthetic labelled corpus is used.
+
+Usage:
+    python -m bench.retrieval_eval [--chunk-sizes 500 1000 1500] [--ks 3 5 8]
+    python -m bench.retrieval_eval --dataset qa.jsonl --documents manual.pdf notes.txt
+"""
+import argparse
+import itertools
+import json
+import time
+import uuid
+from pathlib import Path
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+
+from bench.corpus import generate_labelled_corpus
+from bench.stats import latency_summary, write_results
+from bench.stubs import load_embeddings
+from config.settings import CHUNK_SIZE, CHUNK_OVERLAP, RETRIEVER_K, SEMANTIC_WEIGHT
+from src.document_processing.loaders import html_to_text, load_pdf_document
+from src.document_processing.processor import split_documents
+from src.rag.chain import create_hybrid_retriever, format_docs
+from src.rag.keyword_index import PartitionedBM25Index
+from src.rag.prompts import create_prompt_template
+from src.utils.tracing import tracer, estimate_tokens
+
+
+def load_dataset(dataset_path, document_paths):
+    """
+    Load a labelled question set and the documents it refers to.
+
+    Args:
+        dataset_path: JSONL file with "question" and "answer" per line
+        document_paths: PDF, HTML or plain-text files to index
+
+    Returns:
+        tuple: (documents, questions)
+    """
+    with open(dataset_path) as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+
+    docs = []
+    for path in document_paths:
+        suffix = Path(path).suffix.lower()
+        if suffix == ".pdf":
+            docs.extend(load_pdf_document(path))
+        else:
+            text = Path(path).read_text(encoding="utf-8", errors="ignore")
+            if suffix in (".html", ".htm"):
+                text = html_to_text(text)
+            docs.append(Document(page_content=text, metadata={"source": str(path)}))
+    return docs, questions
+
+
+def first_relevant_rank(docs, answer):
+    """Return the 1-based rank of the first chunk containing the answer, or None."""
+    needle = answer.lower()
+    for rank, doc in enumerate(docs, start=1):
+        if needle in doc.page_content.lower():
+            return rank
+    return None
+
+
+def evaluate_retriever(retriever, questions, prompt):
+    """
+    Run every question through a retriever.
+
+    Returns:
+        dict with recall@k, MRR, prompt token and latency statistics
+    """
+    hits, reciprocal_ranks, prompt_tokens, latencies = 0, [], [], []
+    for item in questions:
+        started = time.perf_counter()
+        docs = retriever.invoke(item["question"])
+        latencies.append(time.perf_counter() - started)
+
+        rank = first_relevant_rank(docs, item["answer"])
+        hits += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+        rendered = prompt.format(context=format_docs(docs), question=item["question"])
+        prompt_tokens.append(estimate_tokens(rendered))
+
+    latency = latency_summary(latencies)
+    return {
+        "recall_at_k": hits / len(questions),
+        "mrr": sum(reciprocal_ranks) / len(questions),
+        "prompt_tokens_mean": sum(prompt_tokens) / len(prompt_tokens),
+        "prompt_tokens_max": max(prompt_tokens),
+        "latency_p50_ms": latency["p50_ms"],
+        "latency_p99_ms": latency["p99_ms"],
+    }
+
+
+def pareto_front(rows):
+    """
+    Return rows not dominated on (recall higher, latency lower, tokens lower).
+    """
+    def dominates(a, b):
+        no_worse = (a["recall_at_k"] >= b["recall_at_k"]
+                    and a["latency_p50_ms"] <= b["latency_p50_ms"]
+                    and a["prompt_tokens_mean"] <= b["prompt_tokens_mean"])
+        better = (a["recall_at_k"] > b["recall_at_k"]
+                  or a["latency_p50_ms"] < b["latency_p50_ms"]
+                  or a["prompt_tokens_mean"] < b["prompt_tokens_mean"])
+        return no_worse and better
+
+    return [row for row in rows if not any(dominates(other, row) for other in rows)]
+
+
+def format_report(rows, front):
+    """Render the results as a markdown table, Pareto-optimal rows marked with *."""
+    front_ids = {id(row) for row in front}
+    header = ("| | chunk | overlap | k | sem w | recall@k | MRR | tokens | p50 ms | index s |\n"
+              "|---|---|---|---|---|---|---|---|---|---|")
+    lines = [header]
+    for row in sorted(rows, key=lambda r: (-r["recall_at_k"], r["prompt_tokens_mean"])):
+        lines.append(
+            f"| {'*' if id(row) in front_ids else ''} | {row['chunk_size']} | {row['chunk_overlap']} "
+            f"| {row['k']} | {row['semantic_weight']:.2f} | {row['recall_at_k']:.3f} | {row['mrr']:.3f} "
+            f"| {row['prompt_tokens_mean']:.0f} | {row['latency_p50_ms']:.2f} | {row['index_seconds']:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dataset", help="JSONL with question/answer pairs")
+    parser.add_argument("--documents", nargs="*", default=[], help="Files indexed for --dataset")
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic corpus pages")
+    parser.add_argument("--facts", type=int, default=100, help="Synthetic labelled questions")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, 1000, CHUNK_SIZE])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, CHUNK_OVERLAP])
+    parser.add_argument("--ks", type=int, nargs="+", default=[3, RETRIEVER_K, 8])
+    parser.add_argument("--semantic-weights", type=float, nargs="+", default=[0.3, SEMANTIC_WEIGHT, 0.7])
+    parser.add_argument("--persona", default="Helpful Assistant")
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    tracer.export_path = None
+
+    if args.dataset:
+        docs, questions = load_dataset(args.dataset, args.documents)
+    else:
+        docs, questions = generate_labelled_corpus(args.pages, args.facts)
+    embeddings = load_embeddings(args.embeddings, call_overhead_ms=0.0, per_text_ms=0.0)
+    prompt = create_prompt_template(args.persona)
+
+    rows = []
+    for chunk_size, overlap in itertools.product(args.chunk_sizes, args.overlaps):
+        if overlap >= chunk_size:
+            continue
+
+        started = time.perf_counter()
+        chunks = split_documents(docs, chunk_size=chunk_size, chunk_overlap=overlap)
+        vector_store = Chroma.from_documents(
+            documents=chunks,
+            embedding=embeddings,
+            collection_name=f"eval_{uuid.uuid4().hex[:12]}"
+        )
+        keyword_index = PartitionedBM25Index(chunks)
+        index_seconds = time.perf_counter() - started
+
+        try:
+            for k, semantic_weight in itertools.product(args.ks, args.semantic_weights):
+                retriever = create_hybrid_retriever(
+                    vector_store,
+                    chunks,
+                    k=k,
+                    weights=[semantic_weight, 1.0 - semantic_weight],
+                    keyword_index=keyword_index
+                )
+                row = {
+                    "chunk_size": chunk_size,
+                    "chunk_overlap": overlap,
+                    "k": k,
+                    "semantic_weight": semantic_weight,
+                    "chunks": len(chunks),
+                    "index_seconds": index_seconds,
+                    **evaluate_retriever(retriever, questions, prompt),
+                }
+                rows.append(row)
+                print(f"chunk={chunk_size:<5} overlap={overlap:<4} k={k:<2} sem={semantic_weight:.2f} "
+                      f"recall={row['recall_at_k']:.3f} mrr={row['mrr']:.3f} "
+                      f"tokens={row['prompt_tokens_mean']:.0f} p50={row['latency_p50_ms']:.2f}ms")
+        finally:
+            vector_store.delete_collection()
+
+    front = pareto_front(rows)
+    print("\n" + format_report(rows, front))
+
+    path = write_results("retrieval_eval", {
+        "questions": len(questions),
+        "embeddings": args.embeddings,
+        "rows": rows,
+        "pareto": front,
+    }, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Small statistics and result-writing helpers shared by the benchmarks.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values, pct):
+    """
+    Return the pct-th percentile of values using linear interpolation.
+
+    Args:
+        values: Iterable of numbers
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value, or 0.0 for an empty input
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(latencies_s):
+    """
+    Summarise a list of latencies (seconds) in milliseconds.
+
+    Returns:
+        dict with count, mean, p50, p95 and p99 in ms
+    """
+    if not latencies_s:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    return {
+        "count": len(latencies_s),
+        "mean_ms": 1000 * sum(latencies_s) / len(latencies_s),
+        "p50_ms": 1000 * percentile(latencies_s, 50),
+        "p95_ms": 1000 * percentile(latencies_s, 95),
+        "p99_ms": 1000 * percentile(latencies_s, 99),
+    }
+
+
+def git_revision():
+    """Return the current git commit hash, or 'unknown' outside a checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def write_results(name, results, output=None):
+    """
+    Write benchmark results as JSON, tagged with the environment.
+
+    Args:
+        name: Benchmark name, used in the default file name
+        results: JSON-serialisable results
+        output: Optional explicit output path
+
+    Returns:
+        Path of the written file
+    """
+    revision = git_revision()
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{name}_{revision}_{int(time.time())}.json"
+
+    payload = {
+        "benchmark": name,
+        "git_revision": revision,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    return Path(output)
@@ -0,0 +1,103 @@
+"""
+Offline stand-ins for the external models used by the application.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Deterministic hashing embeddings that mimic the cost profile of a CPU
+    sentence-transformer: a fixed overhead per forward pass plus a small
+    per-text cost. Forward passes are serialised, like a single model
+    saturating the CPU.
+    """
+
+    def __init__(self, dim=384, call_overhead_ms=8.0, per_text_ms=0.5):
+        self.dim = dim
+        self.call_overhead = call_overhead_ms / 1000.0
+        self.per_text = per_text_ms / 1000.0
+        self.forward_passes = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        """Hash tokens into a fixed-size, L2-normalised bag-of-words vector."""
+        vector = [0.0] * self.dim
+        for token in text.lower().split():
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.forward_passes += 1
+            if self.call_overhead or self.per_text:
+                time.sleep(self.call_overhead + self.per_text * len(texts))
+            return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def load_embeddings(kind="stub", **stub_kwargs):
+    """
+    Load embeddings for a benchmark run.
+
+    Args:
+        kind: "stub" for StubEmbeddings, "hf" for the configured HuggingFace model
+        stub_kwargs: Extra arguments for StubEmbeddings
+
+    Returns:
+        Embeddings instance
+    """
+    if kind == "hf":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        from config.settings import EMBEDDING_MODEL_NAME
+
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={"device": "cpu"}
+        )
+    return StubEmbeddings(**stub_kwargs)
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Returns vectors computed ahead of time, so upserts can be timed alone."""
+
+    def __init__(self, vectors_by_text, fallback):
+        self.vectors_by_text = vectors_by_text
+        self.fallback = fallback
+
+    def embed_documents(self, texts):
+        missing = [t for t in texts if t not in self.vectors_by_text]
+        if missing:
+            self.vectors_by_text.update(zip(missing, self.fallback.embed_documents(missing)))
+        return [self.vectors_by_text[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.fallback.embed_query(text)
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model stand-in for ChatGroq returning a fixed answer after a delay."""
+
+    answer: str = "This is a benchmark answer based on the provided context."
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "stub-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
@@ -27,6 +27,19 @@ EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 LLM_MODEL_NAME = "llama-3.3-70b-versatile"
 LLM_TEMPERATURE = 0.2
 
+# LLM gateway (rate limits, retries, coalescing)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "12000"))
+LLM_OUTPUT_TOKENS_RESERVE = 512  # Budgeted per request before usage is known
+LLM_MAX_RETRIES = 4
+LLM_RETRY_BASE_DELAY = 0.5  # Seconds
+LLM_RETRY_MAX_DELAY = 20.0
+
+# Query embedding batching
+EMBED_BATCH_WAIT_MS = 5  # Window for grouping concurrent queries
+EMBED_BATCH_MAX_SIZE = 32
+
 # Text splitter configurations
 CHUNK_SIZE = 1500
 CHUNK_OVERLAP = 200
@@ -35,6 +48,55 @@ CHUNK_OVERLAP = 200
 RETRIEVER_K = 5 
 BM25_WEIGHT = 0.5  
 SEMANTIC_WEIGHT = 0.5  
+RRF_K = 60  # Reciprocal rank fusion damping constant
+BM25_K1 = 1.5  # Keyword index term frequency saturation
+BM25_B = 0.75  # Keyword index length normalisation
+
+# Chat history
+HISTORY_DB_PATH = DATA_DIR / "chat_history.sqlite3"
+HISTORY_WINDOW_SIZE = 20  # Messages kept in session state and rendered
+HISTORY_PAGE_SIZE = 20  # Older messages loaded per "Load earlier" click
+HISTORY_RETENTION_DAYS = 7  # Idle conversations are pruned from disk
+HISTORY_PRUNE_INTERVAL_SECONDS = 3600  # Minimum time between background prunes
+
+# Background ingestion
+JOBS_DIR = DATA_DIR / "jobs"  # Job checkpoints and pending chunks
+LIBRARY_COLLECTION = "intellicite_library"  # Persistent collection shared by all jobs
+INGEST_BATCH_SIZE = 64  # Chunks embedded and upserted per checkpoint
+INGEST_WORKERS = 2
+INGEST_PROGRESS_REFRESH_SECONDS = 1.0
+JOB_TTL_HOURS = 24  # Finished jobs nobody dismissed are forgotten after this
+
+# PDF extraction
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")  # "auto", "pypdf" or "pymupdf"
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = 32  # Page range handed to one worker
+PDF_PARALLEL_MIN_PAGES = 64  # Smaller documents are parsed in-process
+
+# Upload blob store
+BLOB_DIR = DATA_DIR / "blobs"  # Uploads stored by SHA-256 of their content
+BLOB_WRITE_CHUNK_SIZE = 1024 * 1024  # Bytes written per write call
+
+# Index snapshots
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+SNAPSHOT_AUTOLOAD = os.getenv("SNAPSHOT_AUTOLOAD")  # Snapshot imported when the library is empty
+SNAPSHOT_BATCH_SIZE = 1000  # Rows read from or written to Chroma per call
+
+# Index maintenance
+INDEX_REGISTRY_PATH = DATA_DIR / "index_registry.sqlite3"  # Last access per collection and source
+MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "3600"))
+INDEX_DISK_QUOTA_MB = float(os.getenv("INDEX_DISK_QUOTA_MB", "2048"))  # 0 disables eviction
+COLLECTION_TTL_HOURS = 24  # Idle per-session docs_*/fallback_* collections are dropped after this
+ORPHAN_MIN_AGE_SECONDS = 600  # Unreferenced segment directories younger than this are kept
+
+# Tracing
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+TRACE_EXPORT_PATH = BASE_DIR / "traces" / "spans.jsonl"
+TRACE_EXPORT_MAX_BYTES = 50 * 1024 * 1024  # spans.jsonl is rotated past this size
+TRACE_EXPORT_BACKUPS = 3  # Rotated files kept (spans.jsonl.1 ... .3)
+TRACE_EXPORT_QUEUE_SIZE = 10000  # Spans waiting for the writer thread; extra spans are dropped
+TRACE_BUFFER_SIZE = 2000  # Recent spans kept in memory
+TRACE_METRICS_PORT = int(os.getenv("TRACE_METRICS_PORT", "0"))  # 0 disables the endpoint
 
 # Personas
 PERSONAS = {
@@ -1,15 +1,29 @@
-"""Document processing package."""
-from src.document_processing.loaders import (
-    load_pdf_document,
-    load_web_document,
-    load_youtube_document
-)
-from src.document_processing.processor import process_documents
-
-__all__ = [
-    "load_pdf_document",
-    "load_web_document",
-    "load_youtube_document",
-    "process_documents"
-]
+"""
+Document processing package.
 
+Exports are resolved on first access, so importing a submodule (such as
+pdf_worker in PDF worker processes) does not import the whole package.
+"""
+import importlib
+
+_EXPORTS = {
+    "load_pdf_document": "src.document_processing.loaders",
+    "load_web_document": "src.document_processing.loaders",
+    "load_youtube_document": "src.document_processing.loaders",
+    "split_documents": "src.document_processing.processor",
+    "IngestionJob": "src.document_processing.jobs",
+    "IngestionJobManager": "src.document_processing.jobs",
+    "BlobStore": "src.document_processing.blob_store",
+    "open_blob": "src.document_processing.blob_store",
+    "extract_pdf": "src.document_processing.pdf_engine",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,125 @@
+"""
+Content-addressed store for uploaded files.
+
+Uploads are stored under the SHA-256 of their content, so identical files
+are written once and files that share a name never overwrite each other.
+Hashing and writing read straight from the upload's buffer instead of
+copying it into a new bytes object first.
+
+A blob is identified by its key, "<sha256><suffix>", which is what ingested
+chunks record as their source. Keys do not depend on where the store lives,
+so they stay valid in snapshots restored on another machine.
+"""
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.settings import BLOB_DIR, BLOB_WRITE_CHUNK_SIZE
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}(\.\w+)?$")
+
+
+class BlobStore:
+    """
+    Stores blobs at <root>/<sha[:2]>/<sha><suffix>.
+    """
+
+    def __init__(self, root=BLOB_DIR, chunk_size=BLOB_WRITE_CHUNK_SIZE):
+        """
+        Args:
+            root: Directory holding the blobs
+            chunk_size: Bytes written per write call
+        """
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def is_key(value) -> bool:
+        """True if value looks like a blob key."""
+        return isinstance(value, str) and bool(_KEY_RE.match(value))
+
+    def path_for(self, key: str) -> Path:
+        """Return where the blob with this key is stored."""
+        return self.root / key[:2] / key
+
+    def resolve(self, source) -> Path:
+        """Map a blob key to its path; anything else is taken as a file path."""
+        return self.path_for(source) if self.is_key(source) else Path(source)
+
+    def put(self, data, suffix: str = ""):
+        """
+        Store a blob unless an identical one already exists.
+
+        Args:
+            data: bytes-like object, or a file-like object such as a
+                Streamlit UploadedFile (its buffer is used without copying)
+            suffix: File extension kept on disk, e.g. ".pdf"
+
+        Returns:
+            tuple: (key, created) where created is False for a duplicate
+        """
+        with self._view(data) as view:
+            key = hashlib.sha256(view).hexdigest() + suffix
+            path = self.path_for(key)
+            if path.exists():
+                return key, False
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for start in range(0, len(view), self.chunk_size):
+                        f.write(view[start:start + self.chunk_size])
+                # Concurrent writers of the same content race harmlessly here
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            return key, True
+
+    @staticmethod
+    @contextmanager
+    def _view(data):
+        """Yield a flat byte memoryview over data, released afterwards."""
+        if hasattr(data, "getbuffer"):
+            source = data.getbuffer()
+        elif hasattr(data, "read"):
+            data.seek(0)
+            source = data.read()
+        else:
+            source = data
+        view = memoryview(source).cast("B")
+        try:
+            yield view
+        finally:
+            view.release()
+            if isinstance(source, memoryview):
+                # An exported buffer would keep the upload from being resized or freed
+                source.release()
+
+
+@contextmanager
+def open_blob(path):
+    """
+    Memory-map a stored blob read-only.
+
+    The mapping supports read/seek like a file and the buffer protocol,
+    so parsers can read it without loading the file into memory.
+
+    Args:
+        path: Path of the blob
+
+    Yields:
+        mmap.mmap (or an empty memoryview for an empty file)
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
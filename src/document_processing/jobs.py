@@ -0,0 +1,407 @@
+"""
+Background ingestion jobs: load -> split -> embed -> upsert off the UI thread.
+
+Each job checkpoints after every upserted batch, so an interrupted job
+(app restart, crash) resumes from the last completed batch instead of
+re-fetching, re-parsing and re-embedding everything.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from config.settings import BLOB_DIR, JOBS_DIR, INGEST_BATCH_SIZE, INGEST_WORKERS, JOB_TTL_HOURS
+from src.document_processing.loaders import (
+    load_pdf_document,
+    load_web_document,
+    load_youtube_document
+)
+from src.document_processing.processor import split_documents
+from src.vectorstore.chroma_manager import (
+    get_library_vectorstore,
+    library_generation,
+    delete_sources
+)
+from src.utils.tracing import tracer
+
+LOADERS = {
+    "pdf": load_pdf_document,
+    "web": load_web_document,
+    "youtube": load_youtube_document,
+}
+
+QUEUED = "queued"
+LOADING = "loading"
+INDEXING = "indexing"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+ACTIVE_STATUSES = (QUEUED, LOADING, INDEXING)
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+
+def clean_metadata(metadata):
+    """Keep only metadata values Chroma can store (str, int, float, bool)."""
+    return {
+        key: value for key, value in metadata.items()
+        if isinstance(value, (str, int, float, bool))
+    }
+
+
+class IngestionJob:
+    """
+    State of one ingestion job, mirrored to a JSON checkpoint on disk.
+    """
+
+    def __init__(self, source_type, source, label=None, job_id=None):
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.source_type = source_type
+        self.source = source
+        self.label = label or source
+        self.status = QUEUED
+        self.total_chunks = 0
+        self.done_chunks = 0
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.sources = []
+        self._cancel = threading.Event()
+        self._run_started = None
+        self._run_start_chunks = 0
+
+    @property
+    def progress(self) -> float:
+        """Fraction of chunks indexed, between 0 and 1."""
+        if not self.total_chunks:
+            return 0.0
+        return min(1.0, self.done_chunks / self.total_chunks)
+
+    @property
+    def eta_seconds(self):
+        """Estimated seconds left, from the indexing rate of the current run."""
+        if self.status != INDEXING or not self._run_started:
+            return None
+        indexed = self.done_chunks - self._run_start_chunks
+        elapsed = time.time() - self._run_started
+        if indexed <= 0 or elapsed <= 0:
+            return None
+        return (self.total_chunks - self.done_chunks) / (indexed / elapsed)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def to_checkpoint(self):
+        return {
+            "job_id": self.job_id,
+            "source_type": self.source_type,
+            "source": self.source,
+            "label": self.label,
+            "status": self.status,
+            "total_chunks": self.total_chunks,
+            "done_chunks": self.done_chunks,
+            "error": self.error,
+            "sources": self.sources,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_checkpoint(cls, data):
+        job = cls(data["source_type"], data["source"], data.get("label"), data["job_id"])
+        job.status = data["status"]
+        job.total_chunks = data.get("total_chunks", 0)
+        job.done_chunks = data.get("done_chunks", 0)
+        job.error = data.get("error")
+        job.sources = data.get("sources", [])
+        job.created_at = data.get("created_at", job.created_at)
+        job.updated_at = data.get("updated_at", job.updated_at)
+        return job
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs on a worker pool and keeps their checkpoints.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, workers=INGEST_WORKERS, batch_size=INGEST_BATCH_SIZE,
+                 ttl_hours=JOB_TTL_HOURS, blob_dir=BLOB_DIR):
+        """
+        Args:
+            jobs_dir: Directory for checkpoints and pending chunks
+            workers: Number of concurrent ingestion jobs
+            batch_size: Chunks embedded and upserted per checkpoint
+            ttl_hours: Time after which finished jobs are forgotten
+            blob_dir: Blob store root that PDF upload keys refer to
+        """
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.blob_dir = blob_dir
+        self.ttl = ttl_hours * 3600
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._restore()
+
+    def _checkpoint_path(self, job_id):
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _chunks_path(self, job_id):
+        return self.jobs_dir / f"{job_id}.chunks.jsonl"
+
+    def _restore(self):
+        """
+        Reload unfinished jobs from disk, marked interrupted. Finished jobs
+        belonged to sessions that no longer exist, so their files are removed.
+        """
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                with open(path) as f:
+                    job = IngestionJob.from_checkpoint(json.load(f))
+            except (OSError, ValueError, KeyError):
+                continue
+            if job.status in FINISHED_STATUSES:
+                self._delete_files(job.job_id)
+                continue
+            job.status = INTERRUPTED
+            self._jobs[job.job_id] = job
+
+    def _delete_files(self, job_id):
+        for path in (self._checkpoint_path(job_id), self._chunks_path(job_id)):
+            if path.exists():
+                path.unlink()
+
+    def _save(self, job):
+        """Atomically write the job checkpoint."""
+        job.updated_at = time.time()
+        path = self._checkpoint_path(job.job_id)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(job.to_checkpoint(), f)
+        os.replace(tmp_path, path)
+
+    def _write_chunks(self, job, chunks):
+        """Persist split chunks so a resumed job skips load and split."""
+        path = self._chunks_path(job.job_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps({"text": chunk.page_content, "metadata": chunk.metadata}) + "\n")
+        os.replace(tmp_path, path)
+
+    def _read_chunks(self, job):
+        """Return the persisted chunks of a job, or None if it never got that far."""
+        path = self._chunks_path(job.job_id)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return [
+                Document(page_content=item["text"], metadata=item["metadata"])
+                for item in map(json.loads, f)
+            ]
+
+    def submit(self, source_type, source, embedding_model, label=None):
+        """
+        Queue a new ingestion job.
+
+        Args:
+            source_type: "pdf", "web" or "youtube"
+            source: File path or URL
+            embedding_model: Embedding model for vectorization
+            label: Display name for the sidebar
+
+        Returns:
+            IngestionJob
+        """
+        if source_type not in LOADERS:
+            raise ValueError(f"Unknown source type: {source_type}")
+        self.expire()
+        job = IngestionJob(source_type, source, label)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._save(job)
+        self._executor.submit(self._run, job, embedding_model)
+        return job
+
+    def resume(self, job_id, embedding_model):
+        """Resume an interrupted or failed job from its last checkpoint."""
+        job = self.get(job_id)
+        if job is None or job.is_active or job.status == COMPLETED:
+            return job
+        job.status = QUEUED
+        job.error = None
+        job._cancel.clear()
+        self._save(job)
+        self._executor.submit(self._run, job, embedding_model)
+        return job
+
+    def resume_interrupted(self, embedding_model):
+        """
+        Resume the jobs a previous process left unfinished. No session owns
+        them any more, so they are finished in the background.
+
+        Returns:
+            List of resumed jobs
+        """
+        return [
+            self.resume(job.job_id, embedding_model)
+            for job in self.list_jobs() if job.status == INTERRUPTED
+        ]
+
+    def cancel(self, job_id):
+        """Ask a job to stop after its current batch."""
+        job = self.get(job_id)
+        if job is not None and job.is_active:
+            job._cancel.set()
+
+    def discard(self, job_id):
+        """Forget a job that is not running and delete its files."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_active:
+                return
+            del self._jobs[job_id]
+        self._delete_files(job_id)
+
+    def expire(self):
+        """Forget finished jobs that have not changed for longer than the TTL."""
+        cutoff = time.time() - self.ttl
+        for job in self.list_jobs():
+            if job.status in FINISHED_STATUSES and job.updated_at < cutoff:
+                self.discard(job.job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, job_ids=None):
+        """
+        Known jobs, newest first.
+
+        Args:
+            job_ids: Only return these jobs, e.g. the ones a session submitted
+        """
+        with self._lock:
+            jobs = self._jobs.values() if job_ids is None else [
+                self._jobs[job_id] for job_id in job_ids if job_id in self._jobs
+            ]
+            return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def has_active(self, job_ids=None) -> bool:
+        return any(job.is_active for job in self.list_jobs(job_ids))
+
+    def cancel_all(self):
+        """Ask every running or queued job to stop, e.g. before a library reset."""
+        for job in self.list_jobs():
+            if job.is_active:
+                job._cancel.set()
+
+    def _prepare_chunks(self, job):
+        """Load and split the source, or reuse chunks from a previous run."""
+        chunks = self._read_chunks(job)
+        if chunks is not None:
+            if not job.sources:
+                job.sources = sorted({c.metadata["source"] for c in chunks if "source" in c.metadata})
+            return chunks
+
+        job.status = LOADING
+        self._save(job)
+        if job.source_type == "pdf":
+            docs = LOADERS["pdf"](job.source, blob_dir=self.blob_dir)
+        else:
+            docs = LOADERS[job.source_type](job.source)
+        chunks = split_documents(docs)
+        if not chunks:
+            raise Exception("Text splitting failed.")
+
+        extra = {"ingested_at": int(time.time())}
+        if job.source_type == "pdf":
+            # Uploads are stored by content hash; keep the original name for display
+            extra["file_name"] = job.label
+        for chunk in chunks:
+            chunk.metadata = clean_metadata({**chunk.metadata, **extra})
+
+        job.sources = sorted({c.metadata["source"] for c in chunks if "source" in c.metadata})
+        self._write_chunks(job, chunks)
+        job.total_chunks = len(chunks)
+        job.done_chunks = 0
+        return chunks
+
+    def _verify_progress(self, job, vector_store):
+        """
+        Restart from the first chunk if batches this job already wrote are
+        gone, e.g. the library was reset or replaced since they were upserted.
+        """
+        if not job.done_chunks:
+            return
+        ids = [f"{job.job_id}-{i}" for i in range(job.done_chunks)]
+        found = 0
+        for start in range(0, len(ids), self.batch_size):
+            found += len(vector_store.get(ids=ids[start:start + self.batch_size], include=[])["ids"])
+        if found < len(ids):
+            job.done_chunks = 0
+            job._run_start_chunks = 0
+            self._save(job)
+
+    def _run(self, job, embedding_model):
+        """Worker entry point: run a job until done, cancelled or failed."""
+        try:
+            with tracer.trace("ingest", source_type=job.source_type, job_id=job.job_id):
+                generation = library_generation()
+                vector_store = get_library_vectorstore(embedding_model)
+                chunks = self._prepare_chunks(job)
+
+                job.status = INDEXING
+                job._run_started = time.time()
+                job._run_start_chunks = job.done_chunks
+                self._verify_progress(job, vector_store)
+                self._save(job)
+
+                while job.done_chunks < len(chunks):
+                    if generation != library_generation():
+                        # The library was reset or replaced; reopen the new collection
+                        generation = library_generation()
+                        vector_store = get_library_vectorstore(embedding_model)
+                        self._verify_progress(job, vector_store)
+
+                    if job._cancel.is_set():
+                        # Roll back the partial source so the library stays consistent
+                        if job.done_chunks:
+                            vector_store.delete(ids=[f"{job.job_id}-{i}" for i in range(job.done_chunks)])
+                        job.status = CANCELLED
+                        self._save(job)
+                        return
+
+                    start = job.done_chunks
+                    batch = chunks[start:start + self.batch_size]
+                    with tracer.span("ingest.upsert", chunks=len(batch)):
+                        vector_store.add_texts(
+                            texts=[c.page_content for c in batch],
+                            metadatas=[c.metadata for c in batch],
+                            ids=[f"{job.job_id}-{start + i}" for i in range(len(batch))]
+                        )
+                    job.done_chunks = start + len(batch)
+                    self._save(job)
+
+                # Only now drop the chunks of a previous ingest of the same sources,
+                # so a cancelled or failed re-ingest leaves the old ones searchable
+                delete_sources(vector_store, job.sources, keep_prefix=f"{job.job_id}-")
+
+                job.status = COMPLETED
+                self._save(job)
+                chunks_path = self._chunks_path(job.job_id)
+                if chunks_path.exists():
+                    chunks_path.unlink()
+
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            self._save(job)
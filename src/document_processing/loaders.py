@@ -11,29 +11,68 @@ except ImportError:
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
     WebBaseLoader,
-    YoutubeLoader,
-    PyPDFLoader
+    YoutubeLoader
 )
-from config.settings import DATA_DIR
+from config.settings import BLOB_DIR
+from src.document_processing.blob_store import BlobStore
+from src.document_processing.pdf_engine import extract_pdf
+from src.utils.tracing import tracer
 
 
-def load_pdf_document(file_path: str):
+def load_pdf_document(file_path: str, blob_dir=BLOB_DIR):
     """
-    Load a PDF document.
+    Load a PDF document, one Document per page.
+    
+    Large documents are split into page ranges parsed on a process pool.
     
     Args:
-        file_path: Path to the PDF file
+        file_path: Blob key of an upload, or path to the PDF file
+        blob_dir: Root of the blob store the upload was saved to
         
     Returns:
         List of Document objects
     """
     try:
-        loader = PyPDFLoader(file_path)
-        return loader.load()
+        # Chunks keep the blob key as their source, not this machine's path
+        return extract_pdf(BlobStore(blob_dir).resolve(file_path), source=file_path)
     except Exception as e:
         raise Exception(f"Error loading PDF: {e}")
 
 
+def html_to_text(html):
+    """
+    Extract readable text from an HTML page.
+    
+    Args:
+        html: Raw HTML as bytes or str
+        
+    Returns:
+        Whitespace-normalised page text
+    """
+    if HAS_BS4:
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+        
+        # Get text
+        text = soup.get_text()
+        
+        # Clean up whitespace
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return ' '.join(chunk for chunk in chunks if chunk)
+    
+    # Fallback: simple regex-based HTML removal
+    import re
+    text = html.decode("utf-8", errors="ignore") if isinstance(html, bytes) else html
+    # Remove HTML tags
+    text = re.sub('<[^<]+?>', '', text)
+    # Clean up whitespace
+    return re.sub(r'\s+', ' ', text).strip()
+
+
 def load_web_document(url: str):
     """
     Load a document from a website URL using requests + BeautifulSoup.
@@ -49,31 +88,14 @@ def load_web_document(url: str):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        with tracer.span("ingest.fetch", source_type="web") as span:
+            response = requests.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+            span["bytes"] = len(response.content)
         
-        if HAS_BS4:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-        else:
-            # Fallback: simple regex-based HTML removal
-            import re
-            text = response.text
-            # Remove HTML tags
-            text = re.sub('<[^<]+?>', '', text)
-            # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
+        with tracer.span("ingest.parse", source_type="web") as span:
+            text = html_to_text(response.content)
+            span["chars"] = len(text)
         
         if not text or len(text.strip()) == 0:
             raise Exception("No content extracted from webpage")
@@ -130,8 +152,11 @@ def load_youtube_document(url: str):
         youtube_url = f"https://www.youtube.com/watch?v={video_id}"
         
         try:
-            loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=True)
-            docs = loader.load()
+            # Transcript download and parsing happen together in the loader
+            with tracer.span("ingest.fetch", source_type="youtube") as span:
+                loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=True)
+                docs = loader.load()
+                span["documents"] = len(docs)
             
             if not docs or len(docs) == 0:
                 raise Exception(f"No transcript found for video ID: {video_id}. The video may not have captions available.")
@@ -153,19 +178,23 @@ def load_youtube_document(url: str):
             raise Exception(f"Error loading YouTube video: {e}. Make sure you provided a valid YouTube URL.")
 
 
-def save_uploaded_file(uploaded_file, destination_dir=DATA_DIR):
+def save_uploaded_file(uploaded_file, destination_dir=BLOB_DIR):
     """
-    Save an uploaded file to the destination directory.
+    Save an uploaded file to the content-addressed blob store.
+    
+    Identical uploads map to the same key and are only written once.
     
     Args:
         uploaded_file: Streamlit uploaded file object
-        destination_dir: Directory to save the file
+        destination_dir: Root directory of the blob store
         
     Returns:
-        Path to the saved file
+        Blob key of the saved file, usable as a document source
     """
-    file_path = os.path.join(destination_dir, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getvalue())
-    return file_path
+    suffix = os.path.splitext(uploaded_file.name)[1].lower()
+    with tracer.span("ingest.fetch", source_type="upload") as span:
+        key, created = BlobStore(destination_dir).put(uploaded_file, suffix=suffix)
+        span["bytes"] = uploaded_file.size
+        span["deduplicated"] = not created
+    return key
 
@@ -0,0 +1,139 @@
+"""
+PDF text extraction engine.
+
+Splits a document into page ranges and extracts them on a process pool,
+using PyMuPDF when it is installed and pypdf otherwise. Every page becomes
+one Document with its 0-based page number in the metadata, matching what
+PyPDFLoader produced.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from langchain_core.documents import Document
+
+from config.settings import PDF_BACKEND, PDF_WORKERS, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES
+from src.document_processing.pdf_worker import HAS_PYMUPDF, count_pages, extract_page_range
+from src.utils.tracing import tracer
+
+BACKENDS = ("pypdf", "pymupdf")
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_backend(backend: str = PDF_BACKEND) -> str:
+    """
+    Resolve "auto" to the fastest installed backend and validate the name.
+
+    Returns:
+        "pypdf" or "pymupdf"
+    """
+    if backend == "auto":
+        return "pymupdf" if HAS_PYMUPDF else "pypdf"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    if backend == "pymupdf" and not HAS_PYMUPDF:
+        raise Exception("PyMuPDF is not installed. Try: pip install pymupdf")
+    return backend
+
+
+def _mp_context():
+    """
+    Forking the threaded Streamlit server is unsafe, so workers come from a
+    fork server that preloads only the leaf pdf_worker module; each worker
+    then starts without importing the application (see pdf_forkserver).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["src.document_processing.pdf_forkserver"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _get_pool(workers: int):
+    """Return the shared process pool, recreating it if the size changed."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared worker processes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def page_ranges(page_count: int, pages_per_task: int):
+    """Split [0, page_count) into consecutive (start, stop) ranges."""
+    return [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+
+
+def extract_pdf(path, backend: str = PDF_BACKEND, workers: int = PDF_WORKERS,
+                pages_per_task: int = PDF_PAGES_PER_TASK,
+                parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES, source=None):
+    """
+    Extract the text of every page of a PDF.
+
+    Args:
+        path: Path to the PDF file
+        backend: "auto", "pypdf" or "pymupdf"
+        workers: Worker processes; 1 parses in-process
+        pages_per_task: Pages per worker task
+        parallel_min_pages: Documents with fewer pages are parsed in-process
+        source: Source recorded in the page metadata, defaults to path
+
+    Returns:
+        List of Document objects, one per page, in page order
+    """
+    path = str(path)
+    backend = resolve_backend(backend)
+
+    with tracer.span("ingest.parse", source_type="pdf", backend=backend) as span:
+        total_pages = count_pages(path, backend)
+        ranges = page_ranges(total_pages, pages_per_task)
+
+        pages = None
+        if workers > 1 and total_pages >= parallel_min_pages and len(ranges) > 1:
+            try:
+                pool = _get_pool(workers)
+                futures = [
+                    pool.submit(extract_page_range, path, start, stop, backend)
+                    for start, stop in ranges
+                ]
+                pages = [page for future in futures for page in future.result()]
+                span["workers"] = workers
+            except BrokenProcessPool:
+                shutdown_pool()
+
+        if pages is None:
+            pages = extract_page_range(path, 0, total_pages, backend)
+            span["workers"] = 1
+        span["pages"] = total_pages
+
+    return [
+        Document(
+            page_content=text,
+            metadata={
+                "source": source or path,
+                "page": index,
+                "page_label": label,
+                "total_pages": total_pages,
+            }
+        )
+        for index, label, text in pages
+    ]
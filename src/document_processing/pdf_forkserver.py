@@ -0,0 +1,20 @@
+"""
+Preload module of the PDF worker fork server.
+
+Imported only inside the fork server started by pdf_engine, never by the
+application. Workers normally re-run the parent's __main__ before their
+first task; under Streamlit that is the app script itself, so each worker
+would load the whole application. Tasks only reference pdf_worker, so the
+fork server's children skip that step.
+"""
+from multiprocessing import spawn
+
+import src.document_processing.pdf_worker  # noqa: F401
+
+
+def _skip_main_fixup(*args, **kwargs):
+    return None
+
+
+spawn._fixup_main_from_name = _skip_main_fixup
+spawn._fixup_main_from_path = _skip_main_fixup
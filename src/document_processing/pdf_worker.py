@@ -0,0 +1,67 @@
+"""
+Page extraction run inside PDF worker processes.
+
+This module is preloaded by the worker fork server, so it must stay a
+leaf: it imports the PDF parsers and the blob reader, and nothing that
+pulls in Streamlit, Chroma or the rest of the application.
+"""
+from pypdf import PdfReader
+
+try:
+    import pymupdf
+    HAS_PYMUPDF = True
+except ImportError:
+    try:
+        import fitz as pymupdf
+        HAS_PYMUPDF = True
+    except ImportError:
+        HAS_PYMUPDF = False
+
+from src.document_processing.blob_store import open_blob
+
+
+def _pypdf_page_labels(reader, start, stop):
+    try:
+        return reader.page_labels[start:stop]
+    except Exception:
+        return [str(i + 1) for i in range(start, stop)]
+
+
+def _extract_pypdf(path, start, stop):
+    with open_blob(path) as data:
+        reader = PdfReader(data)
+        labels = _pypdf_page_labels(reader, start, stop)
+        return [
+            (i, labels[i - start], reader.pages[i].extract_text())
+            for i in range(start, stop)
+        ]
+
+
+def _extract_pymupdf(path, start, stop):
+    with pymupdf.open(path) as doc:
+        pages = []
+        for i in range(start, stop):
+            page = doc[i]
+            pages.append((i, page.get_label() or str(i + 1), page.get_text()))
+        return pages
+
+
+def count_pages(path, backend: str) -> int:
+    """Return the number of pages in a PDF."""
+    if backend == "pymupdf":
+        with pymupdf.open(path) as doc:
+            return doc.page_count
+    with open_blob(path) as data:
+        return len(PdfReader(data).pages)
+
+
+def extract_page_range(path, start: int, stop: int, backend: str):
+    """
+    Extract pages [start, stop) of a PDF. Runs in pool workers.
+
+    Returns:
+        List of (page index, page label, text)
+    """
+    if backend == "pymupdf":
+        return _extract_pymupdf(path, start, stop)
+    return _extract_pypdf(path, start, stop)
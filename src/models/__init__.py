@@ -1,5 +1,6 @@
 """Models package for LLM and embeddings."""
 from src.models.loader import load_all_models
+from src.models.embeddings import BatchedQueryEmbeddings
+from src.models.gateway import LLMGateway, TokenBucket
 
-__all__ = ["load_all_models"]
-
+__all__ = ["load_all_models", "BatchedQueryEmbeddings", "LLMGateway", "TokenBucket"]
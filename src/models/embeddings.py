@@ -0,0 +1,107 @@
+"""
+Embedding utilities, including micro-batching of concurrent query embeddings.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+from config.settings import EMBED_BATCH_WAIT_MS, EMBED_BATCH_MAX_SIZE
+from src.utils.tracing import tracer
+
+
+class BatchedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that groups concurrent ``embed_query`` calls into a
+    single forward pass of the underlying model.
+
+    The first query to arrive opens a short wait window; every query that
+    arrives before the window closes (or until the batch is full) is embedded
+    together with ``embed_documents`` and the vectors are handed back to the
+    waiting callers.
+    """
+
+    def __init__(self, embedding_model, max_wait_ms=EMBED_BATCH_WAIT_MS,
+                 max_batch_size=EMBED_BATCH_MAX_SIZE):
+        """
+        Args:
+            embedding_model: Underlying embeddings (e.g. HuggingFaceEmbeddings)
+            max_wait_ms: How long to wait for more queries after the first one
+            max_batch_size: Maximum number of queries per forward pass
+        """
+        self.embedding_model = embedding_model
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        """Embed documents directly; ingestion already batches its input."""
+        with tracer.span("embed.documents", texts=len(texts)):
+            return self.embedding_model.embed_documents(texts)
+
+    def embed_query(self, text):
+        """
+        Embed a single query, sharing the forward pass with concurrent callers.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Embedding vector for the query
+        """
+        self._ensure_worker()
+        future = Future()
+        with tracer.span("embed.query"):
+            self._queue.put((text, future))
+            return future.result()
+
+    def _ensure_worker(self):
+        """Start the batching thread on first use."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="query-embedding-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self):
+        """Block for the first query, then gather more until the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Batching loop executed by the worker thread."""
+        while True:
+            batch = self._collect_batch()
+
+            # Identical concurrent queries only need to be embedded once
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                with tracer.span("embed.query_batch", batch_size=len(batch)):
+                    vectors = self.embedding_model.embed_documents(unique_texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            by_text = dict(zip(unique_texts, vectors))
+            for text, future in batch:
+                future.set_result(by_text[text])
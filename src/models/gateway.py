@@ -0,0 +1,366 @@
+"""
+Rate-limit-aware gateway around the chat model.
+
+Wraps the LLM with token-bucket limits on requests and tokens, a cap on
+concurrent upstream calls, jittered retries on 429/5xx errors and
+coalescing of identical in-flight prompts into a single upstream call.
+"""
+import hashlib
+import random
+import threading
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from config.settings import (
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_OUTPUT_TOKENS_RESERVE,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY
+)
+from src.utils.tracing import tracer, estimate_tokens
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = ("RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError")
+
+# The gateway run already reports to the caller's callbacks; the wrapped
+# model's own run must not report the same request a second time
+UPSTREAM_CONFIG = {"callbacks": []}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate` per second.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """
+        Block until `amount` tokens are available, then take them.
+
+        Requests larger than the bucket are capped to its capacity so they
+        can still proceed once the bucket is full.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def debit(self, amount: float):
+        """Adjust the balance without blocking (may go negative)."""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+
+class _LeaderCancelled(Exception):
+    """The caller that owned a shared upstream call went away before it finished."""
+
+
+class _InFlight:
+    """
+    One upstream call shared by every caller that sent the same prompt.
+    Streamed chunks are kept so late followers can replay them.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.done = False
+        self._cond = threading.Condition()
+
+    def publish(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, result=None, error=None):
+        with self._cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Release followers without an error; they make their own call."""
+        with self._cond:
+            self.cancelled = True
+            self.done = True
+            self._cond.notify_all()
+
+    def wait_result(self):
+        with self._cond:
+            while not self.done:
+                self._cond.wait()
+            if self.cancelled:
+                raise _LeaderCancelled()
+            if self.error is not None:
+                raise self.error
+            return self.result
+
+    def follow(self):
+        """Yield the leader's chunks as they arrive."""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                if index < len(self.chunks):
+                    chunk = self.chunks[index]
+                    index += 1
+                elif self.cancelled:
+                    raise _LeaderCancelled()
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            # Each caller gets its own message object; stream() mutates it
+            yield ChatGenerationChunk(message=chunk.message.model_copy(deep=True))
+
+
+def is_retryable_error(error) -> bool:
+    """Return True for rate limits, timeouts, connection and 5xx errors."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return True
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message
+
+
+def retry_after_seconds(error):
+    """Return the server's Retry-After hint in seconds, if it sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMGateway(BaseChatModel):
+    """
+    Chat model wrapper that enforces rate limits and bounded concurrency,
+    retries transient failures and coalesces identical concurrent prompts.
+    """
+    llm: BaseChatModel
+    max_concurrency: int = LLM_MAX_CONCURRENCY
+    requests_per_minute: float = LLM_REQUESTS_PER_MINUTE
+    tokens_per_minute: float = LLM_TOKENS_PER_MINUTE
+    output_tokens_reserve: int = LLM_OUTPUT_TOKENS_RESERVE
+    max_retries: int = LLM_MAX_RETRIES
+    retry_base_delay: float = LLM_RETRY_BASE_DELAY
+    retry_max_delay: float = LLM_RETRY_MAX_DELAY
+
+    _semaphore: object = PrivateAttr(default=None)
+    _request_bucket: object = PrivateAttr(default=None)
+    _token_bucket: object = PrivateAttr(default=None)
+    _flights_lock: object = PrivateAttr(default=None)
+    _generate_flights: dict = PrivateAttr(default_factory=dict)
+    _stream_flights: dict = PrivateAttr(default_factory=dict)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, llm, **kwargs):
+        super().__init__(llm=llm, **kwargs)
+        self._semaphore = threading.BoundedSemaphore(max(1, self.max_concurrency))
+        # Allow at most one second of request burst
+        self._request_bucket = TokenBucket(
+            self.requests_per_minute / 60.0,
+            max(1.0, self.requests_per_minute / 60.0)
+        )
+        self._token_bucket = TokenBucket(self.tokens_per_minute / 60.0, self.tokens_per_minute)
+        self._flights_lock = threading.Lock()
+
+    @property
+    def _llm_type(self):
+        return f"gateway-{getattr(self.llm, '_llm_type', 'llm')}"
+
+    @staticmethod
+    def _request_key(messages, stop, kwargs):
+        """Hash of everything that determines the upstream response."""
+        digest = hashlib.sha256()
+        for message in messages:
+            digest.update(message.type.encode())
+            digest.update(b"\0")
+            digest.update(str(message.content).encode("utf-8"))
+            digest.update(b"\1")
+        digest.update(repr((stop, sorted(kwargs.items()))).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _join(self, flights, key):
+        """Return (flight, is_leader) for a request key."""
+        with self._flights_lock:
+            flight = flights.get(key)
+            if flight is not None and not flight.done:
+                return flight, False
+            flight = _InFlight()
+            flights[key] = flight
+            return flight, True
+
+    def _leave(self, flights, key, flight):
+        with self._flights_lock:
+            if flights.get(key) is flight:
+                del flights[key]
+
+    def _acquire_budget(self, estimated_tokens):
+        """Wait for both the request and the token bucket."""
+        with tracer.span("llm.rate_limit_wait", tokens_est=estimated_tokens):
+            self._request_bucket.acquire(1)
+            self._token_bucket.acquire(estimated_tokens)
+
+    def _backoff(self, attempt, error):
+        """Sleep before a retry using Retry-After or full-jitter exponential backoff."""
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        tracer.increment("llm_retries")
+        time.sleep(delay)
+
+    def _estimate_tokens(self, messages):
+        text = "".join(str(m.content) for m in messages)
+        return estimate_tokens(text) + self.output_tokens_reserve
+
+    def _settle_tokens(self, estimated, message):
+        """Correct the token bucket once the provider reports real usage."""
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            self._token_bucket.debit(usage.get("total_tokens", estimated) - estimated)
+
+    def _call_upstream(self, messages, stop, **kwargs):
+        """Invoke the wrapped model with limits and retries."""
+        estimated = self._estimate_tokens(messages)
+        for attempt in range(self.max_retries + 1):
+            self._acquire_budget(estimated)
+            try:
+                with self._semaphore:
+                    message = self.llm.invoke(messages, config=UPSTREAM_CONFIG, stop=stop, **kwargs)
+                self._settle_tokens(estimated, message)
+                return message
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                self._backoff(attempt, e)
+
+    def _stream_upstream(self, messages, stop, **kwargs):
+        """Stream from the wrapped model; retries only before the first chunk."""
+        estimated = self._estimate_tokens(messages)
+        for attempt in range(self.max_retries + 1):
+            self._acquire_budget(estimated)
+            started = False
+            try:
+                with self._semaphore:
+                    last = None
+                    for message_chunk in self.llm.stream(messages, config=UPSTREAM_CONFIG, stop=stop, **kwargs):
+                        started = True
+                        if not isinstance(message_chunk, BaseMessageChunk):
+                            # Models without native streaming yield one whole message
+                            message_chunk = AIMessageChunk(**message_chunk.model_dump(exclude={"type"}))
+                        last = message_chunk
+                        yield ChatGenerationChunk(message=message_chunk)
+                self._settle_tokens(estimated, last)
+                return
+            except Exception as e:
+                if started or attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                self._backoff(attempt, e)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._request_key(messages, stop, kwargs)
+        flight, leader = self._join(self._generate_flights, key)
+        if not leader:
+            tracer.increment("llm_coalesced")
+            try:
+                # Each caller gets its own result; callers may mutate it
+                return flight.wait_result().model_copy(deep=True)
+            except _LeaderCancelled:
+                return self._generate(messages, stop, run_manager, **kwargs)
+
+        try:
+            message = self._call_upstream(messages, stop, **kwargs)
+            result = ChatResult(generations=[ChatGeneration(message=message)])
+            flight.finish(result=result)
+            return result
+        except Exception as e:
+            flight.finish(error=e)
+            raise
+        except BaseException:
+            # The leader's caller stopped (closed stream, killed script thread);
+            # that is not the followers' error
+            flight.cancel()
+            raise
+        finally:
+            self._leave(self._generate_flights, key, flight)
+
+    def _follow_stream(self, flight, messages, stop, run_manager, **kwargs):
+        """Replay a leader's stream, taking over if the leader is cancelled."""
+        replayed = 0
+        try:
+            for chunk in flight.follow():
+                if isinstance(chunk.message.content, str):
+                    replayed += len(chunk.message.content)
+                yield chunk
+            return
+        except _LeaderCancelled:
+            pass
+
+        # Make the call ourselves and continue after the text already replayed
+        for chunk in self._stream(messages, stop, run_manager, **kwargs):
+            content = chunk.message.content
+            if replayed and isinstance(content, str):
+                if len(content) <= replayed:
+                    replayed -= len(content)
+                    continue
+                chunk.message.content = content[replayed:]
+                replayed = 0
+            yield chunk
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._request_key(messages, stop, kwargs)
+        flight, leader = self._join(self._stream_flights, key)
+        if not leader:
+            tracer.increment("llm_coalesced")
+            yield from self._follow_stream(flight, messages, stop, run_manager, **kwargs)
+            return
+
+        try:
+            for chunk in self._stream_upstream(messages, stop, **kwargs):
+                flight.publish(chunk)
+                yield ChatGenerationChunk(message=chunk.message.model_copy(deep=True))
+            flight.finish()
+        except Exception as e:
+            flight.finish(error=e)
+            raise
+        except BaseException:
+            flight.cancel()
+            raise
+        finally:
+            self._leave(self._stream_flights, key, flight)
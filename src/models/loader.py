@@ -5,6 +5,8 @@ import streamlit as st
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_groq import ChatGroq
 
+from src.models.embeddings import BatchedQueryEmbeddings
+from src.models.gateway import LLMGateway
 from config.settings import (
     GROQ_API_KEY,
     EMBEDDING_MODEL_NAME,
@@ -32,13 +34,20 @@ def load_all_models():
             model_kwargs={"device": "cpu"}
         )
         
+        # Group concurrent query embeddings into shared forward passes
+        embedding_model = BatchedQueryEmbeddings(embedding_model)
+        
         # Load Groq LLM
         llm_model = ChatGroq(
             api_key=GROQ_API_KEY,
             model=LLM_MODEL_NAME,
-            temperature=LLM_TEMPERATURE
+            temperature=LLM_TEMPERATURE,
+            max_retries=0  # Retries are handled by the gateway
         )
         
+        # Shared gateway: rate limits, retries and prompt coalescing
+        llm_model = LLMGateway(llm_model)
+        
         return embedding_model, llm_model
     
     except Exception as e:
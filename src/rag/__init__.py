@@ -1,9 +1,14 @@
 """RAG (Retrieval Augmented Generation) package."""
 from src.rag.chain import create_rag_chain
 from src.rag.prompts import create_prompt_template
+from src.rag.keyword_index import PartitionedBM25Index, KeywordRetriever
+from src.rag.scope import RetrievalScope
 
 __all__ = [
     "create_rag_chain",
-    "create_prompt_template"
+    "create_prompt_template",
+    "PartitionedBM25Index",
+    "KeywordRetriever",
+    "RetrievalScope"
 ]
 
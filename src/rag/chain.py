@@ -1,34 +1,45 @@
 """
 RAG chain creation utilities with hybrid BM25 + semantic retrieval.
 """
+import time
+
 import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.retrievers import BaseRetriever
-from langchain_community.retrievers import BM25Retriever
 
-from config.settings import RETRIEVER_K, BM25_WEIGHT, SEMANTIC_WEIGHT
+from config.settings import RETRIEVER_K, BM25_WEIGHT, SEMANTIC_WEIGHT, RRF_K
+from src.rag.keyword_index import PartitionedBM25Index, KeywordRetriever
 from src.rag.prompts import create_prompt_template
+from src.utils.tracing import tracer, estimate_tokens
 
 
 class HybridRetriever(BaseRetriever):
     """
-    Hybrid retriever combining BM25 and semantic search results.
+    Hybrid retriever combining BM25 and semantic search results
+    with weighted reciprocal rank fusion, optionally restricted to a
+    RetrievalScope.
     """
     semantic_retriever: object
     bm25_retriever: object
     semantic_weight: float = 0.5
     bm25_weight: float = 0.5
+    k: int = RETRIEVER_K
+    scope: object = None
     
     class Config:
         arbitrary_types_allowed = True
     
-    def __init__(self, semantic_retriever, bm25_retriever, weights):
-        super().__init__()
-        self.semantic_retriever = semantic_retriever
-        self.bm25_retriever = bm25_retriever
-        self.semantic_weight = weights[0]
-        self.bm25_weight = weights[1]
+    def __init__(self, semantic_retriever, bm25_retriever, weights, k=RETRIEVER_K, scope=None):
+        super().__init__(
+            semantic_retriever=semantic_retriever,
+            bm25_retriever=bm25_retriever,
+            semantic_weight=weights[0],
+            bm25_weight=weights[1],
+            k=k,
+            scope=scope
+        )
     
     def _get_relevant_documents(self, query: str):
         """
@@ -36,30 +47,116 @@ class HybridRetriever(BaseRetriever):
         """
         try:
             # Get results from both retrievers
-            semantic_docs = self.semantic_retriever.invoke(query)
-            bm25_docs = self.bm25_retriever.invoke(query)
-            
-            # Combine and deduplicate by content
-            combined_docs = []
-            seen_content = set()
-            
-            # Add semantic results (weighted higher if semantic_weight > bm25_weight)
-            for doc in semantic_docs:
-                if doc.page_content not in seen_content:
-                    combined_docs.append(doc)
-                    seen_content.add(doc.page_content)
+            scoped = self.scope is not None and not self.scope.is_empty
+            with tracer.span("retrieve.vector_search", scoped=scoped) as span:
+                semantic_docs = self.semantic_retriever.invoke(query)
+                span["results"] = len(semantic_docs)
+            with tracer.span("retrieve.bm25_search", scoped=scoped) as span:
+                bm25_docs = self.bm25_retriever.invoke(query)
+                span["results"] = len(bm25_docs)
             
-            # Add BM25 results
-            for doc in bm25_docs:
-                if doc.page_content not in seen_content:
-                    combined_docs.append(doc)
-                    seen_content.add(doc.page_content)
+            with tracer.span("retrieve.fusion"):
+                # Weighted reciprocal rank fusion, deduplicated by content
+                scores = {}
+                docs_by_content = {}
+                for docs, weight in (
+                    (semantic_docs, self.semantic_weight),
+                    (bm25_docs, self.bm25_weight)
+                ):
+                    for rank, doc in enumerate(docs):
+                        content = doc.page_content
+                        docs_by_content.setdefault(content, doc)
+                        scores[content] = scores.get(content, 0.0) + weight / (RRF_K + rank + 1)
+                
+                # Stable sort keeps semantic order on ties
+                ranked = sorted(docs_by_content, key=lambda c: scores[c], reverse=True)
             
             # Return top K documents
-            return combined_docs[:RETRIEVER_K]
+            return [docs_by_content[c] for c in ranked[:self.k]]
         except Exception as e:
             # Fallback to semantic search only on error
-            return self.semantic_retriever.invoke(query)
+            with tracer.span("retrieve.vector_search", fallback=True):
+                return self.semantic_retriever.invoke(query)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler recording LLM time-to-first-token, total time and
+    token usage on the trace that was active when it was created.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.trace_id = tracer.current_trace_id()
+        self._started = {}
+        self._first_token = set()
+        self._tokens_in = {}
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+        text = "".join(str(m.content) for batch in messages for m in batch)
+        self._tokens_in[run_id] = estimate_tokens(text)
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+        self._tokens_in[run_id] = estimate_tokens("".join(prompts))
+    
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        if run_id in self._first_token or run_id not in self._started:
+            return
+        self._first_token.add(run_id)
+        tracer.record("llm.ttft", time.perf_counter() - self._started[run_id], trace_id=self.trace_id)
+    
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        tokens_in, tokens_out = self._token_usage(response)
+        estimated = tokens_in is None
+        if tokens_in is None:
+            tokens_in = self._tokens_in.get(run_id, 0)
+            tokens_out = estimate_tokens("".join(
+                g.text for gens in response.generations for g in gens
+            ))
+        self._tokens_in.pop(run_id, None)
+        self._first_token.discard(run_id)
+        
+        tracer.record(
+            "llm.total",
+            time.perf_counter() - started,
+            trace_id=self.trace_id,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            tokens_estimated=estimated
+        )
+        tracer.increment("llm_tokens", tokens_in, direction="in")
+        tracer.increment("llm_tokens", tokens_out, direction="out")
+    
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        self._tokens_in.pop(run_id, None)
+        self._first_token.discard(run_id)
+        if started is not None:
+            tracer.record(
+                "llm.total",
+                time.perf_counter() - started,
+                trace_id=self.trace_id,
+                error=f"{type(error).__name__}: {error}"
+            )
+        tracer.increment("llm_errors")
+    
+    @staticmethod
+    def _token_usage(response):
+        """Extract (tokens_in, tokens_out) reported by the provider, if any."""
+        for gens in response.generations:
+            for gen in gens:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                if usage:
+                    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        return None, None
 
 
 def format_docs(docs):
@@ -75,37 +172,76 @@ def format_docs(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
 
-def create_hybrid_retriever(vector_store, documents):
+def build_prompt(prompt, inputs):
+    """
+    Render the prompt template, recording its size on the current trace.
+    
+    Args:
+        prompt: PromptTemplate to render
+        inputs: dict with context and question
+        
+    Returns:
+        Rendered prompt value
+    """
+    with tracer.span("prompt.build") as span:
+        prompt_value = prompt.invoke(inputs)
+        text = prompt_value.to_string()
+        span["chars"] = len(text)
+        span["tokens_est"] = estimate_tokens(text)
+    return prompt_value
+
+
+def semantic_search_kwargs(k=RETRIEVER_K, scope=None):
+    """
+    Build vector store search kwargs, pushing the scope into Chroma's where clause.
+    """
+    search_kwargs = {"k": k}
+    where = scope.to_chroma_where() if scope is not None else None
+    if where:
+        search_kwargs["filter"] = where
+    return search_kwargs
+
+
+def create_hybrid_retriever(vector_store, documents, k=RETRIEVER_K, weights=None,
+                            keyword_index=None, scope=None):
     """
     Create a hybrid retriever combining BM25 and semantic search.
     
     Args:
         vector_store: Chroma vector store for semantic search
         documents: List of documents for BM25 indexing
+        k: Number of documents to return
+        weights: [semantic_weight, bm25_weight], defaults to the settings
+        keyword_index: Prebuilt PartitionedBM25Index to reuse instead of indexing documents
+        scope: Optional RetrievalScope applied to both searches
         
     Returns:
         HybridRetriever combining both methods
     """
     # Semantic retriever from vector store
     semantic_retriever = vector_store.as_retriever(
-        search_kwargs={"k": RETRIEVER_K}
+        search_kwargs=semantic_search_kwargs(k, scope)
     )
     
-    # BM25 retriever
-    bm25_retriever = BM25Retriever.from_documents(documents)
-    bm25_retriever.k = RETRIEVER_K
+    # BM25 retriever over the per-source partitioned index
+    if keyword_index is None:
+        keyword_index = PartitionedBM25Index(documents)
+    bm25_retriever = KeywordRetriever(index=keyword_index, k=k, scope=scope)
     
     # Hybrid retriever - combines both with configurable weights
     hybrid_retriever = HybridRetriever(
         semantic_retriever=semantic_retriever,
         bm25_retriever=bm25_retriever,
-        weights=[SEMANTIC_WEIGHT, BM25_WEIGHT]
+        weights=weights or [SEMANTIC_WEIGHT, BM25_WEIGHT],
+        k=k,
+        scope=scope
     )
     
     return hybrid_retriever
 
 
-def create_rag_chain(vector_store, llm_model, persona: str, documents=None):
+def create_rag_chain(vector_store, llm_model, persona: str, documents=None, scope=None,
+                     on_retrieve=None):
     """
     Create a RAG chain with hybrid BM25 + semantic retrieval.
     
@@ -114,6 +250,8 @@ def create_rag_chain(vector_store, llm_model, persona: str, documents=None):
         llm_model: Language model
         persona: Selected persona name
         documents: List of documents for BM25 (optional, will extract from vector store if not provided)
+        scope: Optional RetrievalScope restricting sources, pages or dates
+        on_retrieve: Optional callback receiving the retrieved documents
         
     Returns:
         RAG chain or None on failure
@@ -129,13 +267,18 @@ def create_rag_chain(vector_store, llm_model, persona: str, documents=None):
     try:
         # Try to get documents from session state or parameter
         retriever = None
+        keyword_index = None
         
         if documents is None:
+            # Reuse the session's keyword index instead of re-indexing per query
+            keyword_index = st.session_state.get('keyword_index')
             documents = st.session_state.get('document_chunks')
         
         if documents:
             try:
-                retriever = create_hybrid_retriever(vector_store, documents)
+                retriever = create_hybrid_retriever(
+                    vector_store, documents, keyword_index=keyword_index, scope=scope
+                )
             except Exception as e:
                 # Fallback to semantic search on hybrid creation failure
                 retriever = None
@@ -143,16 +286,19 @@ def create_rag_chain(vector_store, llm_model, persona: str, documents=None):
         # Fallback to semantic-only retriever
         if retriever is None:
             retriever = vector_store.as_retriever(
-                search_kwargs={"k": RETRIEVER_K}
+                search_kwargs=semantic_search_kwargs(RETRIEVER_K, scope)
             )
         
+        if on_retrieve is not None:
+            retriever = retriever | RunnableLambda(lambda docs: on_retrieve(docs) or docs)
+        
         # Create prompt template
         prompt = create_prompt_template(persona)
         
         # Create RAG chain
         chain = (
             {"context": retriever | format_docs, "question": RunnablePassthrough()}
-            | prompt
+            | RunnableLambda(lambda inputs: build_prompt(prompt, inputs))
             | llm_model
             | StrOutputParser()
         )
@@ -0,0 +1,277 @@
+"""
+BM25 keyword index with postings partitioned by source.
+
+Scoped queries only walk the postings of the selected sources, so their
+cost scales with the selected subset rather than the whole library. Term
+statistics (document frequency, average length) stay global, so scores are
+comparable across partitions and with an unscoped query. Page and date
+filters are resolved to allowed chunk ids before any scoring.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+from langchain_core.retrievers import BaseRetriever
+
+from config.settings import RETRIEVER_K, BM25_K1, BM25_B
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    """Lowercase word tokens used for indexing and querying."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Partition:
+    """Documents, postings and filterable metadata of one source."""
+
+    def __init__(self):
+        self.docs = []
+        self.lengths = []
+        self.postings = {}
+        self.pages = {}
+        self.ingested_at = []
+        self.dated = 0
+        self.oldest = None
+        self.newest = None
+
+    def add(self, doc, tokens):
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append((doc_id, tf))
+        self.track(doc_id, doc.metadata)
+
+    def track(self, doc_id, metadata):
+        """Record the page and ingestion time of a chunk for filtering."""
+        page = metadata.get("page")
+        if isinstance(page, int):
+            self.pages.setdefault(page, []).append(doc_id)
+        ingested_at = metadata.get("ingested_at")
+        if isinstance(ingested_at, (int, float)):
+            self.ingested_at.append(ingested_at)
+            self.dated += 1
+            self.oldest = ingested_at if self.oldest is None else min(self.oldest, ingested_at)
+            self.newest = ingested_at if self.newest is None else max(self.newest, ingested_at)
+        else:
+            self.ingested_at.append(None)
+
+    def allowed(self, scope):
+        """
+        Resolve the scope's page and date filters to chunk ids, mirroring
+        RetrievalScope.matches.
+
+        Returns:
+            None if every chunk matches, otherwise the set of matching ids
+        """
+        allowed = None
+        if scope.pages:
+            first, last = scope.pages
+            allowed = {
+                doc_id for page, ids in self.pages.items()
+                if first <= page <= last for doc_id in ids
+            }
+
+        if scope.date_from is not None or scope.date_to is not None:
+            if not self.dated:
+                return set()
+            low = scope.date_from if scope.date_from is not None else self.oldest
+            high = scope.date_to if scope.date_to is not None else self.newest
+            if self.oldest > high or self.newest < low:
+                return set()
+            if self.dated < len(self.docs) or self.oldest < low or self.newest > high:
+                # Chunks of one source usually share a time; this is the rare mixed case
+                in_range = {
+                    doc_id for doc_id, t in enumerate(self.ingested_at)
+                    if t is not None and low <= t <= high
+                }
+                allowed = in_range if allowed is None else allowed & in_range
+        return allowed
+
+
+class PartitionedBM25Index:
+    """
+    Okapi BM25 over chunks, with one postings partition per source.
+    """
+
+    def __init__(self, documents=None, k1=BM25_K1, b=BM25_B):
+        """
+        Args:
+            documents: Initial chunk Documents
+            k1: Term frequency saturation
+            b: Length normalisation
+        """
+        self.k1 = k1
+        self.b = b
+        self._partitions = {}
+        self._df = Counter()
+        self._doc_count = 0
+        self._total_length = 0
+        self._lock = threading.RLock()
+        if documents:
+            self.add_documents(documents)
+
+    def __len__(self):
+        return self._doc_count
+
+    def sources(self):
+        """Return the indexed source values."""
+        with self._lock:
+            return sorted(self._partitions)
+
+    def source_metadata(self, source):
+        """Return the metadata of a source's first chunk, or {} if unknown."""
+        with self._lock:
+            partition = self._partitions.get(source)
+            return dict(partition.docs[0].metadata) if partition and partition.docs else {}
+
+    def documents(self, sources=None):
+        """Return indexed chunks, optionally only for some sources."""
+        with self._lock:
+            names = self._partitions if sources is None else [s for s in sources if s in self._partitions]
+            return [doc for name in names for doc in self._partitions[name].docs]
+
+    def add_documents(self, documents):
+        """Index chunks, each into the partition of its metadata source."""
+        with self._lock:
+            for doc in documents:
+                source = doc.metadata.get("source", "")
+                partition = self._partitions.setdefault(source, _Partition())
+                tokens = tokenize(doc.page_content)
+                partition.add(doc, tokens)
+                self._df.update(set(tokens))
+                self._doc_count += 1
+                self._total_length += len(tokens)
+
+    def remove_sources(self, sources):
+        """Drop whole partitions, e.g. when a source is re-ingested or evicted."""
+        with self._lock:
+            for source in sources:
+                partition = self._partitions.pop(source, None)
+                if partition is None:
+                    continue
+                for term, postings in partition.postings.items():
+                    self._df[term] -= len(postings)
+                    if self._df[term] <= 0:
+                        del self._df[term]
+                self._doc_count -= len(partition.docs)
+                self._total_length -= sum(partition.lengths)
+
+    def to_dict(self, row_of):
+        """
+        Serialize the index without its documents.
+
+        Args:
+            row_of: Function mapping a Document to its row in the stored chunk list
+
+        Returns:
+            JSON-serializable dict; postings are flattened [doc_id, tf, ...] lists
+        """
+        with self._lock:
+            return {
+                "k1": self.k1,
+                "b": self.b,
+                "partitions": [
+                    {
+                        "source": source,
+                        "rows": [row_of(doc) for doc in partition.docs],
+                        "lengths": partition.lengths,
+                        "postings": {
+                            term: [value for posting in postings for value in posting]
+                            for term, postings in partition.postings.items()
+                        },
+                    }
+                    for source, partition in self._partitions.items()
+                ],
+            }
+
+    @classmethod
+    def from_dict(cls, data, documents):
+        """
+        Rebuild an index serialized by to_dict without re-tokenizing.
+
+        Args:
+            data: Output of to_dict
+            documents: Chunk list the stored rows refer to
+        """
+        index = cls(k1=data["k1"], b=data["b"])
+        for item in data["partitions"]:
+            partition = _Partition()
+            partition.docs = [documents[row] for row in item["rows"]]
+            partition.lengths = list(item["lengths"])
+            for doc_id, doc in enumerate(partition.docs):
+                partition.track(doc_id, doc.metadata)
+            for term, flat in item["postings"].items():
+                postings = list(zip(flat[0::2], flat[1::2]))
+                partition.postings[term] = postings
+                index._df[term] += len(postings)
+            index._partitions[item["source"]] = partition
+            index._doc_count += len(partition.docs)
+            index._total_length += sum(partition.lengths)
+        return index
+
+    def _idf(self, term):
+        df = self._df.get(term, 0)
+        return math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = RETRIEVER_K, scope=None):
+        """
+        Return the top-k chunks for a query.
+
+        Args:
+            query: Query text
+            k: Number of results
+            scope: Optional RetrievalScope; only its sources' postings are scanned
+
+        Returns:
+            List of Documents, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._doc_count:
+                return []
+
+            if scope is not None and scope.sources:
+                names = [s for s in scope.sources if s in self._partitions]
+            else:
+                names = list(self._partitions)
+            needs_filter = scope is not None and not scope.is_empty
+            avg_length = self._total_length / self._doc_count
+            idf = {term: self._idf(term) for term in terms}
+
+            candidates = []
+            for name in names:
+                partition = self._partitions[name]
+                allowed = partition.allowed(scope) if needs_filter else None
+                if allowed is not None and not allowed:
+                    continue
+                scores = {}
+                for term in terms:
+                    for doc_id, tf in partition.postings.get(term, ()):
+                        if allowed is not None and doc_id not in allowed:
+                            continue
+                        norm = self.k1 * (1 - self.b + self.b * partition.lengths[doc_id] / avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf[term] * tf * (self.k1 + 1) / (tf + norm)
+                candidates.extend((score, partition.docs[doc_id]) for doc_id, score in scores.items())
+
+        best = heapq.nlargest(k, enumerate(candidates), key=lambda item: item[1][0])
+        return [doc for _, (_, doc) in best]
+
+
+class KeywordRetriever(BaseRetriever):
+    """
+    Retriever over a PartitionedBM25Index, optionally scoped.
+    """
+    index: object
+    k: int = RETRIEVER_K
+    scope: object = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, **kwargs):
+        return self.index.search(query, k=self.k, scope=self.scope)
@@ -0,0 +1,76 @@
+"""
+Retrieval scope: restrict queries to a subset of sources, pages or dates.
+"""
+
+
+class RetrievalScope:
+    """
+    Metadata filter applied to both the vector store and the keyword index.
+    """
+
+    def __init__(self, sources=None, pages=None, date_from=None, date_to=None):
+        """
+        Args:
+            sources: Iterable of source values (URL or file path), None for all
+            pages: (first, last) 0-based page range, inclusive, None for all
+            date_from: Earliest ingestion time (epoch seconds), inclusive
+            date_to: Latest ingestion time (epoch seconds), inclusive
+        """
+        self.sources = sorted(set(sources)) if sources else None
+        self.pages = tuple(pages) if pages else None
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @property
+    def is_empty(self) -> bool:
+        """True when the scope does not restrict anything."""
+        return not (self.sources or self.pages or self.date_from is not None or self.date_to is not None)
+
+    def to_chroma_where(self):
+        """
+        Build the equivalent Chroma `where` clause.
+
+        Returns:
+            dict for Chroma's where parameter, or None for no filter
+        """
+        conditions = []
+        if self.sources:
+            conditions.append({"source": {"$in": list(self.sources)}})
+        if self.pages:
+            conditions.append({"page": {"$gte": self.pages[0]}})
+            conditions.append({"page": {"$lte": self.pages[1]}})
+        if self.date_from is not None:
+            conditions.append({"ingested_at": {"$gte": int(self.date_from)}})
+        if self.date_to is not None:
+            conditions.append({"ingested_at": {"$lte": int(self.date_to)}})
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    def matches(self, metadata) -> bool:
+        """
+        Check a chunk's metadata against the scope, mirroring the Chroma filter
+        (a chunk without the filtered key does not match).
+        """
+        if self.sources and metadata.get("source") not in self.sources:
+            return False
+        if self.pages:
+            page = metadata.get("page")
+            if not isinstance(page, int) or not self.pages[0] <= page <= self.pages[1]:
+                return False
+        if self.date_from is not None or self.date_to is not None:
+            ingested_at = metadata.get("ingested_at")
+            if not isinstance(ingested_at, (int, float)):
+                return False
+            if self.date_from is not None and ingested_at < self.date_from:
+                return False
+            if self.date_to is not None and ingested_at > self.date_to:
+                return False
+        return True
+
+    def __repr__(self):
+        return (f"RetrievalScope(sources={self.sources}, pages={self.pages}, "
+                f"date_from={self.date_from}, date_to={self.date_to})")
@@ -2,7 +2,37 @@
 Chat interface UI components.
 """
 import streamlit as st
-from src.rag.chain import create_rag_chain
+from config.settings import HISTORY_PAGE_SIZE
+from src.rag.chain import create_rag_chain, TracingCallbackHandler
+from src.utils.session import get_history_store, add_message, retrieval_recorder
+from src.utils.tracing import tracer
+
+
+def render_earlier_messages():
+    """Render "load earlier" paging for messages outside the session window."""
+    messages = st.session_state.messages
+    if not messages or "id" not in messages[0]:
+        return
+    
+    store = get_history_store()
+    conversation_id = st.session_state.conversation_id
+    first_id = messages[0]["id"]
+    
+    pages = st.session_state.get("history_pages", 0)
+    earlier = store.fetch_before(conversation_id, first_id, pages * HISTORY_PAGE_SIZE) if pages else []
+    remaining = store.count_before(conversation_id, earlier[0]["id"] if earlier else first_id)
+    
+    col_more, col_less = st.columns(2)
+    if remaining and col_more.button(f"Load earlier ({remaining} more)"):
+        st.session_state.history_pages = pages + 1
+        st.rerun()
+    if pages and col_less.button("Hide earlier"):
+        st.session_state.history_pages = 0
+        st.rerun()
+    
+    for msg in earlier:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
 
 
 def render_chat_interface():
@@ -10,7 +40,10 @@ def render_chat_interface():
     st.title("Intellicite: AI Document Assistant")
     st.markdown("---")
     
-    # Display chat history
+    # Older turns are paged in from disk only when requested
+    render_earlier_messages()
+    
+    # Display the recent window of chat history
     for msg in st.session_state.messages:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
@@ -23,7 +56,7 @@ def render_chat_interface():
             st.warning("Process a document first.")
         else:
             # Add user message to history
-            st.session_state.messages.append({"role": "user", "content": user_input})
+            add_message("user", user_input)
             
             # Display user message
             with st.chat_message("user"):
@@ -32,26 +65,37 @@ def render_chat_interface():
             # Generate and display assistant response
             with st.spinner("Thinking..."):
                 try:
-                    chain = create_rag_chain(
-                        st.session_state.vectorstore,
-                        st.session_state.llm,
-                        st.session_state.persona_select
-                    )
-                    
-                    if chain:
-                        answer = chain.invoke(user_input)
-                        st.session_state.messages.append({"role": "assistant", "content": answer})
+                    with tracer.trace("query", question_chars=len(user_input)):
+                        chain = create_rag_chain(
+                            st.session_state.vectorstore,
+                            st.session_state.llm,
+                            st.session_state.persona_select,
+                            scope=st.session_state.retrieval_scope,
+                            on_retrieve=retrieval_recorder()
+                        )
                         
-                        with st.chat_message("assistant"):
-                            st.markdown(answer)
-                    else:
-                        error_msg = "Failed to create RAG chain. Please try again."
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                        st.error(error_msg)
+                        if chain:
+                            # Stream so time-to-first-token can be traced
+                            with st.chat_message("assistant"):
+                                placeholder = st.empty()
+                                answer = ""
+                                for piece in chain.stream(
+                                    user_input,
+                                    config={"callbacks": [TracingCallbackHandler()]}
+                                ):
+                                    answer += piece
+                                    placeholder.markdown(answer)
+                            add_message("assistant", answer)
+                        else:
+                            error_msg = "Failed to create RAG chain. Please try again."
+                            tracer.increment("query_failures")
+                            add_message("assistant", error_msg)
+                            st.error(error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error generating answer: {e}"
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    tracer.increment("query_failures")
+                    add_message("assistant", error_msg)
                     st.error(error_msg)
     
     st.markdown("---")
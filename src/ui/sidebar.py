@@ -1,17 +1,29 @@
 """
 Sidebar UI components.
 """
+import datetime
+import os
+
 import streamlit as st
-from config.settings import PERSONAS
-from src.models.loader import load_all_models
-from src.vectorstore.chroma_manager import cleanup_chroma_db
-from src.document_processing.loaders import (
-    load_pdf_document,
-    load_web_document,
-    load_youtube_document,
-    save_uploaded_file
+from config.settings import PERSONAS, INGEST_PROGRESS_REFRESH_SECONDS
+from src.vectorstore.chroma_manager import (
+    cleanup_chroma_db,
+    get_library_vectorstore,
+    library_generation,
+    load_source_chunks
+)
+from src.vectorstore.snapshot import export_snapshot, import_snapshot, list_snapshots
+from src.document_processing.loaders import save_uploaded_file
+from src.document_processing.jobs import COMPLETED, FAILED, INDEXING, INTERRUPTED
+from src.rag.scope import RetrievalScope
+from src.utils.tracing import tracer
+from src.utils.session import (
+    add_message,
+    get_job_manager,
+    get_index_maintainer,
+    set_document_chunks,
+    merge_document_chunks
 )
-from src.document_processing.processor import process_documents
 
 
 def render_sidebar():
@@ -22,11 +34,24 @@ def render_sidebar():
         # Reset Database button
         if st.button("Reset Database"):
             st.session_state.vectorstore = None
-            if cleanup_chroma_db():
+            st.session_state.retrieval_scope = None
+            set_document_chunks([])
+            # Running jobs would keep writing into the dropped library
+            get_job_manager().cancel_all()
+            cleaned = cleanup_chroma_db()
+            st.session_state.library_generation = library_generation()
+            if cleaned:
+                # Reclaim the dropped collections' files in the background
+                get_index_maintainer().request_run()
                 st.success("Database reset.")
             else:
                 st.warning("Partial reset. Restart app if issues occur.")
         
+        # Export or restore the whole library
+        if st.session_state.embeddings_model:
+            with st.expander("Index Snapshots"):
+                render_snapshots()
+        
         # Model status
         if st.session_state.llm:
             st.success("LLM Loaded ✔")
@@ -44,6 +69,10 @@ def render_sidebar():
                 index=default_index
             )
             
+            # Restrict retrieval to some sources, pages or dates
+            if st.session_state.keyword_index.sources():
+                render_search_scope()
+            
             # Document source selection
             st.header("Document Source")
             source_option = st.radio(
@@ -62,9 +91,75 @@ def render_sidebar():
             # YouTube
             elif source_option == "YouTube":
                 render_youtube_upload()
+            
+            # Background ingestion progress of this session's jobs
+            if get_job_manager().has_active(st.session_state.ingest_jobs):
+                render_ingestion_jobs_live(live=True)
+            else:
+                render_ingestion_jobs()
         
         else:
             st.error("LLM not loaded. Check your GROQ_API_KEY.")
+        
+        # Optional performance panel
+        if st.checkbox("Show performance panel", key="show_performance_panel"):
+            render_performance_panel()
+
+
+def render_snapshots():
+    """Render snapshot export and import controls."""
+    if st.button("Export snapshot"):
+        try:
+            with st.spinner("Exporting..."):
+                path = export_snapshot()
+            st.success(f"Snapshot saved to {path}")
+        except Exception as e:
+            st.error(f"Snapshot export failed: {e}")
+    
+    snapshots = list_snapshots()
+    if not snapshots:
+        st.caption("No snapshots yet.")
+        return
+    
+    labels = {
+        str(path): f"{path.name} ({manifest.get('chunks', 0)} chunks, {len(manifest.get('sources', []))} sources)"
+        for path, manifest in snapshots
+    }
+    selected = st.selectbox("Snapshot", list(labels), format_func=labels.get)
+    if st.button("Import snapshot"):
+        try:
+            # Running jobs would index into the library being replaced
+            get_job_manager().cancel_all()
+            with st.spinner("Importing..."):
+                vector_store, chunks, keyword_index = import_snapshot(
+                    selected, st.session_state.embeddings_model
+                )
+            st.session_state.library_generation = library_generation()
+            st.session_state.vectorstore = vector_store
+            st.session_state.retrieval_scope = None
+            set_document_chunks(chunks, keyword_index)
+            st.success(f"Imported {len(chunks)} chunks.")
+        except Exception as e:
+            st.error(f"Snapshot import failed: {e}")
+
+
+def submit_ingestion(source_type, source, label):
+    """
+    Queue a background ingestion job for this session.
+    
+    Args:
+        source_type: "pdf", "web" or "youtube"
+        source: File path or URL
+        label: Display name for the job
+    """
+    job = get_job_manager().submit(
+        source_type,
+        source,
+        st.session_state.embeddings_model,
+        label=label
+    )
+    st.session_state.ingest_jobs.append(job.job_id)
+    st.success(f"Queued {label}. You can keep chatting while it is indexed.")
 
 
 def render_pdf_upload():
@@ -72,25 +167,15 @@ def render_pdf_upload():
     pdf = st.file_uploader("Upload PDF", type="pdf")
     
     if st.button("Process PDF") and pdf:
-        with st.spinner("Reading PDF..."):
-            try:
-                file_path = save_uploaded_file(pdf)
-                docs = load_pdf_document(file_path)
-                
-                st.session_state.vectorstore = process_documents(
-                    docs,
-                    st.session_state.embeddings_model
-                )
-                
-                if st.session_state.vectorstore:
-                    st.success("PDF processed!")
-                    st.session_state.messages = [
-                        {"role": "assistant", "content": "PDF ready! Ask anything about it."}
-                    ]
-                    st.rerun()
-            
-            except Exception as e:
-                st.error(f"PDF error: {e}")
+        try:
+            file_path = save_uploaded_file(pdf)
+            if file_path in st.session_state.keyword_index.sources():
+                # Same content is already in the library
+                st.info(f"{pdf.name} is already indexed.")
+            else:
+                submit_ingestion("pdf", file_path, pdf.name)
+        except Exception as e:
+            st.error(f"PDF error: {e}")
 
 
 def render_website_upload():
@@ -98,23 +183,10 @@ def render_website_upload():
     url = st.text_input("Website URL")
     
     if st.button("Process Website") and url:
-        with st.spinner("Reading website..."):
-            try:
-                docs = load_web_document(url)
-                st.session_state.vectorstore = process_documents(
-                    docs,
-                    st.session_state.embeddings_model
-                )
-                
-                if st.session_state.vectorstore:
-                    st.success("Website processed!")
-                    st.session_state.messages = [
-                        {"role": "assistant", "content": "Website processed! Ask away."}
-                    ]
-                    st.rerun()
-            
-            except Exception as e:
-                st.error(f"Website error: {e}")
+        try:
+            submit_ingestion("web", url, url)
+        except Exception as e:
+            st.error(f"Website error: {e}")
 
 
 def render_youtube_upload():
@@ -122,21 +194,190 @@ def render_youtube_upload():
     url = st.text_input("YouTube URL")
     
     if st.button("Process YouTube") and url:
-        with st.spinner("Reading transcript..."):
-            try:
-                docs = load_youtube_document(url)
-                st.session_state.vectorstore = process_documents(
-                    docs,
-                    st.session_state.embeddings_model
-                )
-                
-                if st.session_state.vectorstore:
-                    st.success("Video processed!")
-                    st.session_state.messages = [
-                        {"role": "assistant", "content": "YouTube video ready! Ask about it."}
-                    ]
-                    st.rerun()
-            
-            except Exception as e:
-                st.error(f"YouTube error: {e}")
+        try:
+            submit_ingestion("youtube", url, url)
+        except Exception as e:
+            st.error(f"YouTube error: {e}")
+
+
+def apply_completed_jobs():
+    """
+    Switch this session to the library once its jobs finish.
+    
+    Returns:
+        bool: True if any job was applied
+    """
+    manager = get_job_manager()
+    applied = False
+    
+    for job_id in st.session_state.ingest_jobs:
+        job = manager.get(job_id)
+        if job is None or job.status != COMPLETED or job_id in st.session_state.applied_jobs:
+            continue
+        
+        # Replace older chunks of the same sources in the keyword index
+        vector_store = get_library_vectorstore(st.session_state.embeddings_model)
+        merge_document_chunks(load_source_chunks(vector_store, job.sources))
+        st.session_state.vectorstore = vector_store
+        st.session_state.applied_jobs.add(job_id)
+        # Applied jobs are done with; drop their checkpoints
+        manager.discard(job_id)
+        add_message("assistant", f"{job.label} is ready! Ask anything about it.")
+        applied = True
+    
+    st.session_state.ingest_jobs = [
+        job_id for job_id in st.session_state.ingest_jobs
+        if job_id not in st.session_state.applied_jobs
+    ]
+    return applied
+
+
+def source_label(source):
+    """Short display name for a source: original file name for uploads, URL otherwise."""
+    file_name = st.session_state.keyword_index.source_metadata(source).get("file_name")
+    if file_name:
+        return file_name
+    if "://" in source:
+        return source
+    return os.path.basename(source) or source
+
+
+def render_search_scope():
+    """Render source, page and date filters and store the resulting scope."""
+    st.header("Search Scope")
+    
+    sources = st.multiselect(
+        "Search only in",
+        st.session_state.keyword_index.sources(),
+        format_func=source_label,
+        placeholder="All sources"
+    )
+    
+    pages = None
+    if st.checkbox("Limit pages", key="scope_limit_pages"):
+        cols = st.columns(2)
+        first = cols[0].number_input("From page", min_value=1, value=1, step=1)
+        last = cols[1].number_input("To page", min_value=1, value=max(int(first), 10), step=1)
+        # PDF page metadata is 0-based
+        pages = (int(first) - 1, max(int(first), int(last)) - 1)
+    
+    date_from = date_to = None
+    if st.checkbox("Limit ingestion date", key="scope_limit_dates"):
+        today = datetime.date.today()
+        selected = st.date_input("Ingested between", value=(today - datetime.timedelta(days=7), today))
+        if isinstance(selected, (tuple, list)) and len(selected) == 2:
+            date_from = datetime.datetime.combine(selected[0], datetime.time.min).timestamp()
+            date_to = datetime.datetime.combine(selected[1], datetime.time.max).timestamp()
+    
+    scope = RetrievalScope(sources=sources, pages=pages, date_from=date_from, date_to=date_to)
+    st.session_state.retrieval_scope = None if scope.is_empty else scope
+
+
+def format_eta(seconds):
+    """Format an ETA in seconds for display."""
+    if seconds is None:
+        return "estimating..."
+    if seconds < 60:
+        return f"{seconds:.0f}s left"
+    return f"{seconds / 60:.1f} min left"
+
+
+def render_ingestion_jobs(live=False):
+    """
+    Render progress, cancel and resume controls for this session's ingestion jobs.
+    
+    Args:
+        live: True when running as an auto-refreshing fragment
+    """
+    manager = get_job_manager()
+    
+    if apply_completed_jobs() or (live and not manager.has_active(st.session_state.ingest_jobs)):
+        st.rerun()
+    
+    jobs = manager.list_jobs(st.session_state.ingest_jobs)
+    if not jobs:
+        return
+    
+    st.header("Ingestion Jobs")
+    for job in jobs:
+        label = job.label if len(job.label) <= 40 else job.label[:37] + "..."
+        
+        if job.status == INDEXING:
+            st.progress(
+                job.progress,
+                text=f"{label}: {job.done_chunks}/{job.total_chunks} chunks, {format_eta(job.eta_seconds)}"
+            )
+        elif job.is_active:
+            st.progress(0.0, text=f"{label}: {job.status}...")
+        else:
+            st.caption(f"{label}: {job.status}")
+            if job.error:
+                st.error(job.error)
+        
+        if job.is_active:
+            if st.button("Cancel", key=f"cancel_{job.job_id}"):
+                manager.cancel(job.job_id)
+        else:
+            cols = st.columns(2)
+            if job.status in (INTERRUPTED, FAILED) and cols[0].button("Resume", key=f"resume_{job.job_id}"):
+                manager.resume(job.job_id, st.session_state.embeddings_model)
+                st.rerun()
+            if cols[1].button("Dismiss", key=f"dismiss_{job.job_id}"):
+                manager.discard(job.job_id)
+                st.session_state.ingest_jobs.remove(job.job_id)
+                st.rerun()
+
+
+# Poll job progress without rerunning the whole app when fragments are available
+if hasattr(st, "fragment"):
+    render_ingestion_jobs_live = st.fragment(run_every=INGEST_PROGRESS_REFRESH_SECONDS)(render_ingestion_jobs)
+else:
+    render_ingestion_jobs_live = render_ingestion_jobs
+
+
+def render_performance_panel():
+    """Render per-stage latency stats and the breakdown of the last query."""
+    st.header("Performance")
+    
+    summary = tracer.summary()
+    if not summary:
+        st.caption("No traced activity yet.")
+        return
+    
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+    
+    last_query = tracer.last_trace("query")
+    if last_query:
+        st.caption("Last query")
+        st.dataframe(
+            [
+                {"stage": s["name"], "ms": round(s["duration_ms"], 1), "status": s["status"]}
+                for s in sorted(last_query, key=lambda s: s["start"])
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+    
+    if st.button("Clear traces"):
+        tracer.reset()
+        st.rerun()
+    
+    render_maintenance_status()
+
 
+def render_maintenance_status():
+    """Render the last index maintenance report and a manual trigger."""
+    st.caption("Index maintenance")
+    maintainer = get_index_maintainer()
+    report = maintainer.last_report
+    if report:
+        st.write(
+            f"{report['bytes_after'] / (1024 * 1024):.1f} MB on disk "
+            f"(freed {(report['bytes_before'] - report['bytes_after']) / (1024 * 1024):.1f} MB), "
+            f"{len(report['dropped_collections'])} collections dropped, "
+            f"{len(report['evicted_sources'])} sources evicted"
+        )
+    else:
+        st.write("Not run yet in this process.")
+    if st.button("Run maintenance now"):
+        maintainer.request_run()
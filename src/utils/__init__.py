@@ -1,5 +1,21 @@
 """Utility functions package."""
-from src.utils.session import initialize_session_state
+from src.utils.session import (
+    initialize_session_state,
+    add_message,
+    reset_conversation,
+    set_document_chunks,
+    merge_document_chunks,
+    remove_document_sources
+)
+from src.utils.history import ChatHistoryStore
 
-__all__ = ["initialize_session_state"]
+__all__ = [
+    "initialize_session_state",
+    "add_message",
+    "reset_conversation",
+    "set_document_chunks",
+    "merge_document_chunks",
+    "remove_document_sources",
+    "ChatHistoryStore"
+]
 
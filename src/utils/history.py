@@ -0,0 +1,116 @@
+"""
+SQLite-backed chat history store.
+
+Every message is persisted here; session state only keeps a bounded window
+of recent messages and older turns are paged in from disk on demand. Idle
+conversations are pruned periodically in the background.
+"""
+import sqlite3
+import threading
+import time
+
+from config.settings import HISTORY_DB_PATH, HISTORY_RETENTION_DAYS, HISTORY_PRUNE_INTERVAL_SECONDS
+
+
+class ChatHistoryStore:
+    """
+    Stores chat messages per conversation in a local SQLite database.
+    """
+
+    def __init__(self, db_path=HISTORY_DB_PATH, prune_interval_seconds=HISTORY_PRUNE_INTERVAL_SECONDS):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            prune_interval_seconds: Minimum time between background prunes
+        """
+        self.db_path = db_path
+        self.prune_interval = prune_interval_seconds
+        self._last_prune = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id)"
+        )
+        self._conn.commit()
+
+    def append(self, conversation_id: str, role: str, content: str) -> int:
+        """
+        Persist a message.
+
+        Returns:
+            Id of the stored message (increasing within a conversation)
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (conversation_id, role, content, time.time())
+            )
+            self._conn.commit()
+            due = time.monotonic() - self._last_prune >= self.prune_interval
+            if due:
+                self._last_prune = time.monotonic()
+
+        # Long-running processes keep creating conversations; drop idle ones
+        if due:
+            threading.Thread(target=self.prune, name="history-prune", daemon=True).start()
+        return cursor.lastrowid
+
+    def fetch_before(self, conversation_id: str, before_id: int, limit: int):
+        """
+        Fetch up to `limit` messages older than `before_id`.
+
+        Returns:
+            List of message dicts, oldest first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, content FROM messages "
+                "WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (conversation_id, before_id, limit)
+            ).fetchall()
+        return [{"id": row[0], "role": row[1], "content": row[2]} for row in reversed(rows)]
+
+    def count_before(self, conversation_id: str, before_id: int) -> int:
+        """Return how many messages are older than `before_id`."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ? AND id < ?",
+                (conversation_id, before_id)
+            ).fetchone()[0]
+
+    def delete_conversation(self, conversation_id: str):
+        """Delete every message of a conversation."""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            self._conn.commit()
+
+    def prune(self, max_age_days: float = HISTORY_RETENTION_DAYS):
+        """
+        Delete conversations with no activity in the last `max_age_days`.
+
+        Returns:
+            Number of deleted messages
+        """
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            self._last_prune = time.monotonic()
+            cursor = self._conn.execute(
+                "DELETE FROM messages WHERE conversation_id IN ("
+                "SELECT conversation_id FROM messages GROUP BY conversation_id "
+                "HAVING MAX(created_at) < ?)",
+                (cutoff,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
@@ -1,15 +1,107 @@
 """
 Session state management utilities.
 """
+import uuid
+
 import streamlit as st
 
+from config.settings import HISTORY_WINDOW_SIZE, LIBRARY_COLLECTION, SNAPSHOT_AUTOLOAD
+from src.utils.history import ChatHistoryStore
+from src.rag.keyword_index import PartitionedBM25Index
+
+
+@st.cache_resource
+def get_history_store():
+    """
+    Get the process-wide chat history store, pruning idle conversations once.
+    
+    Returns:
+        ChatHistoryStore instance
+    """
+    store = ChatHistoryStore()
+    store.prune()
+    return store
+
+
+@st.cache_resource
+def get_job_manager():
+    """
+    Get the process-wide background ingestion job manager.
+    
+    Returns:
+        IngestionJobManager instance
+    """
+    # Imported here: document processing itself imports src.utils
+    from src.document_processing.jobs import IngestionJobManager
+    return IngestionJobManager()
+
+
+@st.cache_resource
+def get_index_maintainer():
+    """
+    Get the process-wide index maintainer, with its scheduler running.
+    
+    Returns:
+        IndexMaintainer instance
+    """
+    # Imported here: the vector store package itself imports src.utils
+    from src.vectorstore.maintenance import IndexMaintainer
+    maintainer = IndexMaintainer(is_busy=lambda: get_job_manager().has_active())
+    maintainer.start()
+    return maintainer
+
+
+@st.cache_resource
+def autoload_snapshot(_embedding_model):
+    """
+    Bootstrap the library from SNAPSHOT_AUTOLOAD, once per process and only
+    if the library is empty when the first session starts. A library emptied
+    later by Reset Database stays empty.
+    
+    Args:
+        _embedding_model: Embedding model used for queries (not hashed)
+        
+    Returns:
+        str error message if the import failed, otherwise None
+    """
+    # Imported here: the vector store package itself imports src.utils
+    from src.vectorstore.chroma_manager import get_chroma_client
+    from src.vectorstore.snapshot import import_snapshot
+    
+    if not SNAPSHOT_AUTOLOAD:
+        return None
+    if get_chroma_client().get_or_create_collection(LIBRARY_COLLECTION).count():
+        return None
+    try:
+        import_snapshot(SNAPSHOT_AUTOLOAD, _embedding_model)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+@st.cache_resource
+def resume_interrupted_jobs(_embedding_model):
+    """
+    Finish, once per process, the ingestion jobs a previous run left behind.
+    
+    Args:
+        _embedding_model: Embedding model for vectorization (not hashed)
+        
+    Returns:
+        Number of resumed jobs
+    """
+    return len(get_job_manager().resume_interrupted(_embedding_model))
+
 
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
+    if "conversation_id" not in st.session_state:
+        st.session_state.conversation_id = uuid.uuid4().hex
+        st.session_state.history_pages = 0
+    
     if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Hello! Models are loading..."}
-        ]
+        st.session_state.messages = []
+        add_message("assistant", "Hello! Models are loading...")
     
     if "vectorstore" not in st.session_state:
         st.session_state.vectorstore = None
@@ -22,4 +114,136 @@ def initialize_session_state():
     
     if "persona_select" not in st.session_state:
         st.session_state.persona_select = "Helpful Assistant"
+    
+    if "document_chunks" not in st.session_state:
+        set_document_chunks([])
+    
+    if "retrieval_scope" not in st.session_state:
+        st.session_state.retrieval_scope = None
+    
+    if "eviction_seq" not in st.session_state:
+        st.session_state.eviction_seq = get_index_maintainer().eviction_seq()
+    
+    if "ingest_jobs" not in st.session_state:
+        st.session_state.ingest_jobs = []
+        st.session_state.applied_jobs = set()
+    
+    if "library_loaded" not in st.session_state:
+        st.session_state.library_loaded = False
+        st.session_state.library_generation = None
 
+
+def add_message(role: str, content: str):
+    """
+    Persist a chat message and keep only the recent window in session state.
+    
+    Args:
+        role: "user" or "assistant"
+        content: Message text
+    """
+    message_id = get_history_store().append(st.session_state.conversation_id, role, content)
+    messages = st.session_state.messages
+    messages.append({"role": role, "content": content, "id": message_id})
+    
+    # Older messages stay on disk and are paged in on demand
+    if len(messages) > HISTORY_WINDOW_SIZE:
+        del messages[:len(messages) - HISTORY_WINDOW_SIZE]
+
+
+def set_document_chunks(chunks, keyword_index=None):
+    """
+    Replace the session's chunks and their keyword index.
+    
+    Args:
+        chunks: List of chunk Documents
+        keyword_index: Prebuilt index over chunks, built here if omitted
+    """
+    st.session_state.document_chunks = list(chunks)
+    st.session_state.keyword_index = keyword_index or PartitionedBM25Index(chunks)
+
+
+def merge_document_chunks(chunks):
+    """
+    Add chunks to the session, replacing older chunks of the same sources.
+    Only the affected keyword index partitions are rebuilt.
+    
+    Args:
+        chunks: List of chunk Documents
+    """
+    sources = {c.metadata.get("source", "") for c in chunks}
+    st.session_state.document_chunks = [
+        c for c in st.session_state.document_chunks
+        if c.metadata.get("source", "") not in sources
+    ] + list(chunks)
+    st.session_state.keyword_index.remove_sources(sources)
+    st.session_state.keyword_index.add_documents(chunks)
+    
+    # Drop scope entries for sources that no longer exist
+    scope = st.session_state.get("retrieval_scope")
+    if scope is not None and scope.sources:
+        known = set(st.session_state.keyword_index.sources())
+        if not set(scope.sources) <= known:
+            st.session_state.retrieval_scope = None
+
+
+def remove_document_sources(sources):
+    """
+    Drop every chunk of the given sources from the session.
+    
+    Args:
+        sources: Iterable of source values
+    """
+    sources = set(sources)
+    st.session_state.document_chunks = [
+        c for c in st.session_state.document_chunks
+        if c.metadata.get("source", "") not in sources
+    ]
+    st.session_state.keyword_index.remove_sources(sources)
+    scope = st.session_state.get("retrieval_scope")
+    if scope is not None and scope.sources and sources & set(scope.sources):
+        st.session_state.retrieval_scope = None
+
+
+def sync_evicted_sources():
+    """Forget sources the index maintainer evicted since the last sync."""
+    seq, evicted = get_index_maintainer().evicted_since(st.session_state.eviction_seq)
+    st.session_state.eviction_seq = seq
+    if evicted:
+        remove_document_sources(evicted)
+
+
+def retrieval_recorder():
+    """
+    Build a callback marking the session's collection and retrieved sources
+    as recently used, so quota eviction picks colder sources first.
+    
+    The callback runs on chain worker threads, so it must not read session state.
+    
+    Returns:
+        Function taking the retrieved Documents
+    """
+    registry = get_index_maintainer().registry
+    vector_store = st.session_state.get("vectorstore")
+    collection = getattr(getattr(vector_store, "_collection", None), "name", None)
+    
+    def record(docs):
+        registry.touch(
+            collection=collection,
+            sources={d.metadata.get("source") for d in docs if d.metadata.get("source")}
+        )
+    
+    return record
+
+
+def reset_conversation(content: str):
+    """
+    Start a new conversation with a single assistant message.
+    
+    Args:
+        content: Opening assistant message
+    """
+    get_history_store().delete_conversation(st.session_state.conversation_id)
+    st.session_state.conversation_id = uuid.uuid4().hex
+    st.session_state.history_pages = 0
+    st.session_state.messages = []
+    add_message("assistant", content)
@@ -0,0 +1,391 @@
+"""
+Lightweight per-stage tracing for ingest and query.
+
+Spans are kept in an in-memory ring buffer, aggregated per stage, appended to
+a size-rotated local JSONL file by a background writer and exposed in
+Prometheus text format.
+"""
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config.settings import (
+    TRACE_ENABLED,
+    TRACE_BUFFER_SIZE,
+    TRACE_EXPORT_PATH,
+    TRACE_EXPORT_MAX_BYTES,
+    TRACE_EXPORT_BACKUPS,
+    TRACE_EXPORT_QUEUE_SIZE
+)
+
+# Durations kept per stage for quantile estimates
+_STAGE_WINDOW = 1000
+
+_current_trace = contextvars.ContextVar("intellicite_trace_id", default=None)
+_current_span = contextvars.ContextVar("intellicite_span_id", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of LLM tokens in a text (~4 chars per token).
+
+    Args:
+        text: Input text
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Tracer:
+    """
+    Records timed spans and keeps per-stage aggregates.
+    """
+
+    def __init__(self, enabled=TRACE_ENABLED, buffer_size=TRACE_BUFFER_SIZE,
+                 export_path=TRACE_EXPORT_PATH, export_max_bytes=TRACE_EXPORT_MAX_BYTES,
+                 export_backups=TRACE_EXPORT_BACKUPS, export_queue_size=TRACE_EXPORT_QUEUE_SIZE):
+        self.enabled = enabled
+        self.export_path = export_path
+        self.export_max_bytes = export_max_bytes
+        self.export_backups = export_backups
+        self._spans = deque(maxlen=buffer_size)
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._export_queue = queue.Queue(maxsize=export_queue_size)
+        self._export_thread = None
+        self._export_file = None
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """
+        Start a new trace (e.g. one ingest or one query) with a root span.
+
+        Yields:
+            Mutable attributes dict of the root span
+        """
+        token = _current_trace.set(uuid.uuid4().hex[:16])
+        try:
+            with self.span(name, **attributes) as attrs:
+                yield attrs
+        finally:
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time a block of code as a child of the current span.
+
+        Exceptions are recorded on the span and re-raised.
+
+        Yields:
+            Mutable attributes dict, so the block can attach results
+        """
+        if not self.enabled:
+            yield attributes
+            return
+
+        span_id = uuid.uuid4().hex[:16]
+        parent_id = _current_span.get()
+        token = _current_span.set(span_id)
+        started_at = time.time()
+        started = time.perf_counter()
+        status, error = "ok", None
+        try:
+            yield attributes
+        except BaseException as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish({
+                "trace_id": _current_trace.get(),
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "start": started_at,
+                "duration_ms": (time.perf_counter() - started) * 1000,
+                "status": status,
+                "error": error,
+                "attributes": attributes,
+            })
+
+    def record(self, name: str, duration_s: float, trace_id=None, **attributes):
+        """
+        Record a span whose duration was measured elsewhere (e.g. LLM TTFT).
+
+        Args:
+            name: Stage name
+            duration_s: Duration in seconds
+            trace_id: Trace to attach to, defaults to the current trace
+            attributes: Extra span attributes
+        """
+        if not self.enabled:
+            return
+        self._finish({
+            "trace_id": trace_id or _current_trace.get(),
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": _current_span.get(),
+            "name": name,
+            "start": time.time() - duration_s,
+            "duration_ms": duration_s * 1000,
+            "status": "ok",
+            "error": None,
+            "attributes": attributes,
+        })
+
+    def increment(self, counter: str, value: float = 1, **labels):
+        """Add to a named counter, e.g. LLM tokens in/out."""
+        if not self.enabled:
+            return
+        key = (counter, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def current_trace_id(self):
+        """Return the id of the active trace, if any."""
+        return _current_trace.get()
+
+    def _finish(self, span):
+        """Store a finished span, update aggregates and export it."""
+        with self._lock:
+            self._spans.append(span)
+            stage = self._stages.setdefault(span["name"], {
+                "count": 0,
+                "errors": 0,
+                "total_s": 0.0,
+                "durations": deque(maxlen=_STAGE_WINDOW),
+            })
+            stage["count"] += 1
+            stage["total_s"] += span["duration_ms"] / 1000
+            stage["durations"].append(span["duration_ms"])
+            if span["status"] != "ok":
+                stage["errors"] += 1
+        self._export(span)
+
+    def _export(self, span):
+        """Hand a span to the export writer without blocking the traced code."""
+        if not self.export_path:
+            return
+        if self._export_thread is None:
+            with self._lock:
+                if self._export_thread is None:
+                    self._export_thread = threading.Thread(
+                        target=self._export_loop, name="trace-export", daemon=True
+                    )
+                    self._export_thread.start()
+        try:
+            self._export_queue.put_nowait(span)
+        except queue.Full:
+            self.increment("trace_spans_dropped")
+
+    def _export_loop(self):
+        """Writer thread: append queued spans in batches, rotating by size."""
+        while True:
+            spans = [self._export_queue.get()]
+            while True:
+                try:
+                    spans.append(self._export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            path = self.export_path
+            if not path:
+                continue
+            try:
+                if self._export_file is None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    self._export_file = open(path, "a")
+                self._export_file.write("".join(json.dumps(s, default=str) + "\n" for s in spans))
+                self._export_file.flush()
+                if self._export_file.tell() >= self.export_max_bytes:
+                    self._rotate(path)
+            except OSError:
+                # Tracing must never break the traced code path
+                self.export_path = None
+
+    def _rotate(self, path):
+        """Shift spans.jsonl -> spans.jsonl.1 -> ... and drop the oldest."""
+        self._export_file.close()
+        self._export_file = None
+        for index in range(self.export_backups, 0, -1):
+            source = path if index == 1 else path.with_name(f"{path.name}.{index - 1}")
+            if source.exists():
+                os.replace(source, path.with_name(f"{path.name}.{index}"))
+        # Without backups the current file is simply truncated
+        if path.exists():
+            path.unlink()
+
+    def summary(self):
+        """
+        Summarise recorded stages.
+
+        Returns:
+            List of dicts with stage, count, errors, p50/p95 and total time
+        """
+        with self._lock:
+            rows = []
+            for name, stage in sorted(self._stages.items()):
+                durations = list(stage["durations"])
+                rows.append({
+                    "stage": name,
+                    "count": stage["count"],
+                    "errors": stage["errors"],
+                    "p50_ms": round(_percentile(durations, 50), 2),
+                    "p95_ms": round(_percentile(durations, 95), 2),
+                    "total_s": round(stage["total_s"], 3),
+                })
+            return rows
+
+    def recent_spans(self, limit: int = 100):
+        """Return up to `limit` most recent spans, newest last."""
+        with self._lock:
+            return list(self._spans)[-limit:]
+
+    def last_trace(self, root_name=None):
+        """
+        Return the spans of the most recent trace.
+
+        Args:
+            root_name: Only consider traces whose root span has this name
+        """
+        with self._lock:
+            spans = list(self._spans)
+        for span in reversed(spans):
+            if span["parent_id"] is None and span["trace_id"] and \
+                    (root_name is None or span["name"] == root_name):
+                return [s for s in spans if s["trace_id"] == span["trace_id"]]
+        return []
+
+    def render_prometheus(self) -> str:
+        """Render stage aggregates and counters in Prometheus text format."""
+        lines = [
+            "# HELP intellicite_stage_duration_seconds Latency of traced stages.",
+            "# TYPE intellicite_stage_duration_seconds summary",
+        ]
+        with self._lock:
+            stages = {name: dict(stage, durations=list(stage["durations"]))
+                      for name, stage in self._stages.items()}
+            counters = dict(self._counters)
+
+        for name, stage in sorted(stages.items()):
+            for quantile in (0.5, 0.95, 0.99):
+                value = _percentile(stage["durations"], quantile * 100) / 1000
+                lines.append(
+                    f'intellicite_stage_duration_seconds{{stage="{name}",quantile="{quantile}"}} {value:.6f}'
+                )
+            lines.append(f'intellicite_stage_duration_seconds_sum{{stage="{name}"}} {stage["total_s"]:.6f}')
+            lines.append(f'intellicite_stage_duration_seconds_count{{stage="{name}"}} {stage["count"]}')
+
+        lines.append("# HELP intellicite_stage_errors_total Failed spans per stage.")
+        lines.append("# TYPE intellicite_stage_errors_total counter")
+        for name, stage in sorted(stages.items()):
+            lines.append(f'intellicite_stage_errors_total{{stage="{name}"}} {stage["errors"]}')
+
+        for (counter, labels), value in sorted(counters.items()):
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"intellicite_{counter}_total{{{label_text}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded spans, aggregates and counters."""
+        with self._lock:
+            self._spans.clear()
+            self._stages.clear()
+            self._counters.clear()
+
+
+# Process-wide tracer shared by all sessions
+tracer = Tracer()
+
+
+def traced(name: str):
+    """
+    Decorator that records each call of a function as a span.
+
+    Args:
+        name: Stage name for the span
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics (Prometheus text) and /spans (recent spans as JSONL)."""
+
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body = tracer.render_prometheus()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path.startswith("/spans"):
+            body = "".join(json.dumps(s, default=str) + "\n" for s in tracer.recent_spans(TRACE_BUFFER_SIZE))
+            content_type = "application/x-ndjson"
+        else:
+            self.send_error(404)
+            return
+
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """
+    Start the local metrics endpoint once per process.
+
+    Args:
+        port: TCP port to listen on
+        host: Interface to bind
+
+    Returns:
+        The running server, or None if it could not be started
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None
+            threading.Thread(
+                target=_metrics_server.serve_forever,
+                name="trace-metrics-server",
+                daemon=True
+            ).start()
+        return _metrics_server
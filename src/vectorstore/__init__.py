@@ -1,11 +1,30 @@
 """Vector store package for ChromaDB operations."""
 from src.vectorstore.chroma_manager import (
-    create_vectorstore_from_documents,
-    cleanup_chroma_db
+    cleanup_chroma_db,
+    get_chroma_client,
+    get_library_vectorstore,
+    library_generation,
+    bump_library_generation,
+    load_library,
+    load_source_chunks,
+    delete_sources
 )
+from src.vectorstore.snapshot import export_snapshot, import_snapshot, list_snapshots
+from src.vectorstore.maintenance import IndexRegistry, IndexMaintainer
 
 __all__ = [
-    "create_vectorstore_from_documents",
-    "cleanup_chroma_db"
+    "cleanup_chroma_db",
+    "get_chroma_client",
+    "get_library_vectorstore",
+    "library_generation",
+    "bump_library_generation",
+    "load_library",
+    "load_source_chunks",
+    "delete_sources",
+    "export_snapshot",
+    "import_snapshot",
+    "list_snapshots",
+    "IndexRegistry",
+    "IndexMaintainer"
 ]
 
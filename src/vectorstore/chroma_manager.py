@@ -1,81 +1,159 @@
 """
 ChromaDB vector store management utilities.
 """
-import os
-import shutil
-import time
+import threading
 import streamlit as st
 import chromadb
+from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
 
-from config.settings import CHROMA_DIR
+from config.settings import CHROMA_DIR, LIBRARY_COLLECTION
 
+_client = None
+_client_lock = threading.Lock()
+_library_generation = 0
 
-def create_vectorstore_from_documents(document_chunks, embedding_model):
+
+def get_chroma_client():
+    """
+    Get the process-wide persistent Chroma client.
+    
+    Returns:
+        chromadb PersistentClient for CHROMA_DIR
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+        return _client
+
+
+def library_generation() -> int:
     """
-    Create a ChromaDB vector store from document chunks.
+    Get the library generation, bumped whenever the library collection is
+    dropped. Vector stores opened under an older generation point at a
+    deleted collection and must be reopened.
+    
+    Returns:
+        int generation counter
+    """
+    return _library_generation
+
+
+def bump_library_generation() -> int:
+    """
+    Mark every open library vector store as stale.
+    
+    Returns:
+        int new generation
+    """
+    global _library_generation
+    with _client_lock:
+        _library_generation += 1
+        return _library_generation
+
+
+def get_library_vectorstore(embedding_model):
+    """
+    Open the persistent library collection shared by all ingestion jobs.
     
     Args:
-        document_chunks: List of document chunks
         embedding_model: Embedding model for vectorization
         
     Returns:
-        Chroma vector store or None on failure
+        Chroma vector store
     """
-    try:
-        vector_store = Chroma.from_documents(
-            documents=document_chunks,
-            embedding=embedding_model,
-            collection_name=f"docs_{int(time.time())}"
-        )
-        return vector_store
+    return Chroma(
+        client=get_chroma_client(),
+        collection_name=LIBRARY_COLLECTION,
+        embedding_function=embedding_model
+    )
+
+
+def load_library(embedding_model):
+    """
+    Open the library with its chunks, so a new session can chat right away.
     
-    except Exception as chroma_error:
-        st.error(f"ChromaDB error: {chroma_error}")
-        cleanup_chroma_db()
+    Args:
+        embedding_model: Embedding model for vectorization
         
-        try:
-            # Fallback: try with explicit client
-            client = chromadb.PersistentClient(path=CHROMA_DIR)
-            vector_store = Chroma.from_documents(
-                documents=document_chunks,
-                embedding=embedding_model,
-                client=client,
-                collection_name=f"fallback_{int(time.time())}"
-            )
-            return vector_store
+    Returns:
+        tuple: (vector_store, document_chunks) or (None, []) if the library is empty
+    """
+    vector_store = get_library_vectorstore(embedding_model)
+    data = vector_store.get(include=["documents", "metadatas"])
+    if not data["ids"]:
+        return None, []
+    
+    chunks = [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(data["documents"], data["metadatas"])
+    ]
+    return vector_store, chunks
+
+
+def load_source_chunks(vector_store, sources):
+    """
+    Read back the chunks of some sources.
+    
+    Args:
+        vector_store: Chroma vector store
+        sources: Iterable of source values (URL or file path)
         
-        except Exception as fallback_error:
-            st.error(f"Fallback failure: {fallback_error}")
-            return None
+    Returns:
+        List of chunk Documents
+    """
+    sources = list(sources)
+    if not sources:
+        return []
+    data = vector_store.get(where={"source": {"$in": sources}}, include=["documents", "metadatas"])
+    return [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(data["documents"], data["metadatas"])
+    ]
+
+
+def delete_sources(vector_store, sources, keep_prefix=None):
+    """
+    Remove every chunk belonging to the given sources.
+    
+    Args:
+        vector_store: Chroma vector store
+        sources: Iterable of source values (URL or file path)
+        keep_prefix: Keep chunks whose id starts with this, e.g. a re-ingest's new chunks
+    """
+    sources = list(sources)
+    if not sources:
+        return
+    existing = vector_store.get(where={"source": {"$in": sources}}, include=[])
+    ids = [
+        chunk_id for chunk_id in existing["ids"]
+        if keep_prefix is None or not chunk_id.startswith(keep_prefix)
+    ]
+    if ids:
+        vector_store.delete(ids=ids)
 
 
 def cleanup_chroma_db():
     """
-    Safely cleanup ChromaDB directory.
+    Drop every collection through the open client.
+    
+    Files are never deleted underneath the client; the disk space is
+    reclaimed by index maintenance compaction. Sessions and jobs holding the
+    library reopen it once they see the new library generation.
     
     Returns:
         bool: True if cleanup successful, False otherwise
     """
     try:
-        if os.path.exists(CHROMA_DIR):
-            import gc
-            gc.collect()
-            
-            for attempt in range(3):
-                try:
-                    shutil.rmtree(CHROMA_DIR)
-                    break
-                except PermissionError:
-                    time.sleep(1)
-                    continue
-                except Exception:
-                    break
-        
-        os.makedirs(CHROMA_DIR, exist_ok=True)
+        client = get_chroma_client()
+        for collection in client.list_collections():
+            client.delete_collection(getattr(collection, "name", collection))
         return True
     
     except Exception as e:
         st.warning(f"Could not fully cleanup database: {e}")
         return False
-
+    
+    finally:
+        bump_library_generation()
@@ -0,0 +1,448 @@
+"""
+Index lifecycle maintenance: registry, garbage collection, compaction and
+disk quota.
+
+A registry records when each collection and library source was last used.
+A background scheduler periodically:
+- drops idle per-session docs_*/fallback_* collections,
+- evicts the least recently used library sources while the store is over
+  its disk quota,
+- rebuilds the library after evictions, since deleted rows stay in the
+  HNSW segment files until the segment is rewritten,
+- deletes segment directories no collection references and VACUUMs
+  Chroma's SQLite database.
+Rebuilding and VACUUM lock out writers, so both wait while ingestion is busy.
+"""
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config.settings import (
+    BLOB_DIR,
+    CHROMA_DIR,
+    COLLECTION_TTL_HOURS,
+    INDEX_DISK_QUOTA_MB,
+    INDEX_REGISTRY_PATH,
+    LIBRARY_COLLECTION,
+    MAINTENANCE_INTERVAL_SECONDS,
+    ORPHAN_MIN_AGE_SECONDS,
+    SNAPSHOT_BATCH_SIZE
+)
+from src.document_processing.blob_store import BlobStore
+from src.vectorstore.chroma_manager import bump_library_generation, get_chroma_client
+from src.utils.tracing import tracer
+
+SESSION_COLLECTION_RE = re.compile(r"^(docs|fallback)_(\d+)$")
+REBUILD_COLLECTION = f"{LIBRARY_COLLECTION}__rebuild"
+RETIRED_COLLECTION = f"{LIBRARY_COLLECTION}__retired"
+SEGMENT_DIR_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def directory_size(path) -> int:
+    """Total size in bytes of the files under path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+class IndexRegistry:
+    """
+    Last-access times of collections and library sources, in SQLite.
+
+    Accesses are buffered in memory and written on flush(), so recording
+    them on the query path costs a dict update.
+    """
+
+    def __init__(self, db_path=INDEX_REGISTRY_PATH):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pending_collections = {}
+        self._pending_sources = {}
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS collections ("
+            "name TEXT PRIMARY KEY, last_accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "source TEXT PRIMARY KEY, chunks INTEGER NOT NULL, "
+            "text_bytes INTEGER NOT NULL, last_accessed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def touch(self, collection=None, sources=()):
+        """Record that a collection and some sources were just used."""
+        now = time.time()
+        with self._lock:
+            if collection:
+                self._pending_collections[collection] = now
+            for source in sources:
+                self._pending_sources[source] = now
+
+    def flush(self):
+        """Write buffered access times."""
+        with self._lock:
+            collections, self._pending_collections = self._pending_collections, {}
+            sources, self._pending_sources = self._pending_sources, {}
+            self._conn.executemany(
+                "INSERT INTO collections (name, last_accessed) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET last_accessed = MAX(last_accessed, excluded.last_accessed)",
+                collections.items()
+            )
+            self._conn.executemany(
+                "UPDATE sources SET last_accessed = MAX(last_accessed, ?) WHERE source = ?",
+                [(accessed, source) for source, accessed in sources.items()]
+            )
+            self._conn.commit()
+
+    def collection_last_accessed(self, name):
+        """Return the last access time of a collection, or None if never recorded."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_accessed FROM collections WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def forget_collections(self, names):
+        with self._lock:
+            self._conn.executemany("DELETE FROM collections WHERE name = ?", [(n,) for n in names])
+            self._conn.commit()
+
+    def sync_sources(self, stats):
+        """
+        Make the source table match the library.
+
+        Args:
+            stats: dict of source -> (chunks, text_bytes) currently in the library
+        """
+        now = time.time()
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT source FROM sources")}
+            self._conn.executemany(
+                "DELETE FROM sources WHERE source = ?",
+                [(source,) for source in known - set(stats)]
+            )
+            # New sources count as accessed when first seen
+            self._conn.executemany(
+                "INSERT INTO sources (source, chunks, text_bytes, last_accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET chunks = excluded.chunks, text_bytes = excluded.text_bytes",
+                [(source, chunks, text_bytes, now) for source, (chunks, text_bytes) in stats.items()]
+            )
+            self._conn.commit()
+
+    def sources_by_last_access(self):
+        """
+        Returns:
+            List of (source, chunks, last_accessed), least recently used first
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT source, chunks, last_accessed FROM sources ORDER BY last_accessed ASC"
+            ).fetchall()
+
+    def forget_sources(self, sources):
+        with self._lock:
+            self._conn.executemany("DELETE FROM sources WHERE source = ?", [(s,) for s in sources])
+            self._conn.commit()
+
+
+class IndexMaintainer:
+    """
+    Runs garbage collection, quota enforcement and compaction, on demand or
+    periodically on a background thread.
+    """
+
+    def __init__(self, registry=None, chroma_dir=CHROMA_DIR, quota_mb=INDEX_DISK_QUOTA_MB,
+                 collection_ttl_hours=COLLECTION_TTL_HOURS, interval_seconds=MAINTENANCE_INTERVAL_SECONDS,
+                 is_busy=None, blob_dir=BLOB_DIR):
+        """
+        Args:
+            registry: IndexRegistry, created at the default path if omitted
+            chroma_dir: Persistent Chroma directory
+            quota_mb: Disk quota for chroma_dir in MB, 0 disables eviction
+            collection_ttl_hours: Idle time before a session collection is dropped
+            interval_seconds: Time between scheduled runs
+            is_busy: Callable returning True while ingestion writes to the library
+            blob_dir: Blob store root that evicted upload sources refer to
+        """
+        self.registry = registry or IndexRegistry()
+        self.chroma_dir = Path(chroma_dir)
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.collection_ttl = collection_ttl_hours * 3600
+        self.interval = interval_seconds
+        self.is_busy = is_busy or (lambda: False)
+        self.blob_store = BlobStore(blob_dir)
+        self.last_report = None
+        self._rebuild_pending = False
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._evictions = []
+        self._evictions_lock = threading.Lock()
+
+    def start(self):
+        """Start the background scheduler (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="index-maintenance", daemon=True)
+            self._thread.start()
+
+    def request_run(self):
+        """Ask the scheduler to run as soon as possible."""
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception:
+                tracer.increment("maintenance_failures")
+
+    def eviction_seq(self) -> int:
+        """Sequence number of the latest eviction."""
+        with self._evictions_lock:
+            return len(self._evictions)
+
+    def evicted_since(self, seq):
+        """
+        Return sources evicted after a sequence number.
+
+        Returns:
+            tuple: (latest sequence number, list of evicted sources)
+        """
+        with self._evictions_lock:
+            return len(self._evictions), self._evictions[seq:]
+
+    def run_once(self):
+        """
+        Run one full maintenance pass.
+
+        Returns:
+            dict report of what was removed and the disk usage before/after
+        """
+        with self._run_lock, tracer.trace("maintenance") as trace_attrs:
+            self.registry.flush()
+            report = {"started_at": time.time(), "bytes_before": directory_size(self.chroma_dir)}
+            report["dropped_collections"] = self.collect_garbage()
+            report["evicted_sources"] = self.enforce_quota()
+            report.update(self.compact())
+            report["bytes_after"] = directory_size(self.chroma_dir)
+            trace_attrs.update(
+                dropped=len(report["dropped_collections"]),
+                evicted=len(report["evicted_sources"]),
+                freed_bytes=report["bytes_before"] - report["bytes_after"]
+            )
+            self.last_report = report
+            return report
+
+    def collect_garbage(self):
+        """
+        Drop per-session docs_*/fallback_* collections idle for longer than the TTL.
+        The library and any other collection are never touched.
+
+        Returns:
+            List of dropped collection names
+        """
+        client = get_chroma_client()
+        cutoff = time.time() - self.collection_ttl
+        dropped = []
+        with tracer.span("maintenance.gc") as span:
+            for collection in client.list_collections():
+                name = getattr(collection, "name", collection)
+                match = SESSION_COLLECTION_RE.match(name)
+                if not match:
+                    continue
+                # Fall back to the creation time encoded in the name
+                last_accessed = self.registry.collection_last_accessed(name) or int(match.group(2))
+                if last_accessed < cutoff:
+                    client.delete_collection(name)
+                    dropped.append(name)
+            self.registry.forget_collections(dropped)
+            span["dropped"] = len(dropped)
+        return dropped
+
+    def _library_source_stats(self, collection):
+        """Chunk count and text size per source, read in pages."""
+        stats = {}
+        count = collection.count()
+        for offset in range(0, count, SNAPSHOT_BATCH_SIZE):
+            batch = collection.get(limit=SNAPSHOT_BATCH_SIZE, offset=offset, include=["documents", "metadatas"])
+            for text, metadata in zip(batch["documents"], batch["metadatas"]):
+                source = (metadata or {}).get("source", "")
+                chunks, text_bytes = stats.get(source, (0, 0))
+                stats[source] = (chunks + 1, text_bytes + len((text or "").encode("utf-8")))
+        return stats
+
+    def enforce_quota(self):
+        """
+        Evict least recently used library sources while the store is over quota.
+
+        Each source is assumed to use disk in proportion to its chunk count.
+        The space is only reclaimed once compaction rebuilds the library, so
+        nothing more is evicted until that rebuild has happened.
+
+        Returns:
+            List of evicted sources
+        """
+        client = get_chroma_client()
+        collection = client.get_or_create_collection(LIBRARY_COLLECTION)
+        with tracer.span("maintenance.quota") as span:
+            self.registry.sync_sources(self._library_source_stats(collection))
+            usage = directory_size(self.chroma_dir)
+            span["bytes"] = usage
+            if not self.quota_bytes or usage <= self.quota_bytes:
+                return []
+            if self._rebuild_pending:
+                span["waiting_for_rebuild"] = True
+                return []
+
+            sources = self.registry.sources_by_last_access()
+            total_chunks = sum(chunks for _, chunks, _ in sources) or 1
+            excess = usage - self.quota_bytes
+            evicted = []
+            for source, chunks, _ in sources:
+                if excess <= 0:
+                    break
+                existing = collection.get(where={"source": source}, include=[])["ids"]
+                for start in range(0, len(existing), SNAPSHOT_BATCH_SIZE):
+                    collection.delete(ids=existing[start:start + SNAPSHOT_BATCH_SIZE])
+                self._delete_blob(source)
+                evicted.append(source)
+                excess -= usage * chunks / total_chunks
+
+            self.registry.forget_sources(evicted)
+            self._rebuild_pending = bool(evicted)
+            with self._evictions_lock:
+                self._evictions.extend(evicted)
+            tracer.increment("index_evictions", len(evicted))
+            span["evicted"] = len(evicted)
+            return evicted
+
+    def _delete_blob(self, source):
+        """Remove the uploaded file behind an evicted source, if it is a stored blob."""
+        try:
+            if BlobStore.is_key(source):
+                self.blob_store.path_for(source).unlink(missing_ok=True)
+                return
+            # Older libraries recorded the blob's absolute path
+            path = Path(source).resolve()
+            if self.blob_store.root.resolve() in path.parents and path.is_file():
+                path.unlink()
+        except (OSError, ValueError):
+            pass
+
+    def _segment_ids(self, collection_id):
+        """Segment ids (and directory names) of a collection."""
+        conn = sqlite3.connect(str(self.chroma_dir / "chroma.sqlite3"), timeout=5)
+        try:
+            return [row[0] for row in conn.execute(
+                "SELECT id FROM segments WHERE collection = ?", (str(collection_id),)
+            )]
+        finally:
+            conn.close()
+
+    def rebuild_library(self):
+        """
+        Copy the library's rows into a fresh collection and drop the old one,
+        so the space of deleted rows is returned to the disk. Embeddings are
+        copied, not recomputed. Bumps the library generation.
+
+        Returns:
+            List of segment directory names the old collection used
+        """
+        client = get_chroma_client()
+        old = client.get_or_create_collection(LIBRARY_COLLECTION)
+        old_segments = self._segment_ids(old.id)
+        for name in (REBUILD_COLLECTION, RETIRED_COLLECTION):
+            # Left over from an interrupted rebuild
+            if name in {getattr(c, "name", c) for c in client.list_collections()}:
+                client.delete_collection(name)
+
+        with tracer.span("maintenance.rebuild", chunks=old.count()):
+            new = client.create_collection(REBUILD_COLLECTION, metadata=old.metadata)
+            for offset in range(0, old.count(), SNAPSHOT_BATCH_SIZE):
+                batch = old.get(
+                    limit=SNAPSHOT_BATCH_SIZE,
+                    offset=offset,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                new.add(
+                    ids=batch["ids"],
+                    embeddings=batch["embeddings"],
+                    documents=batch["documents"],
+                    metadatas=batch["metadatas"]
+                )
+
+            old.modify(name=RETIRED_COLLECTION)
+            try:
+                new.modify(name=LIBRARY_COLLECTION)
+            except Exception:
+                # A session reopened the library in between and created an empty one
+                client.delete_collection(LIBRARY_COLLECTION)
+                new.modify(name=LIBRARY_COLLECTION)
+            finally:
+                bump_library_generation()
+            client.delete_collection(RETIRED_COLLECTION)
+        return old_segments
+
+    def compact(self):
+        """
+        Rebuild the library if sources were evicted, delete segment directories
+        no collection references, then VACUUM Chroma's SQLite database. The
+        rebuild and VACUUM are skipped while ingestion is busy, and VACUUM also
+        when the database is locked, until the next run.
+
+        Returns:
+            dict with rebuilt, removed_segment_dirs and vacuumed
+        """
+        db_path = self.chroma_dir / "chroma.sqlite3"
+        result = {"rebuilt": False, "removed_segment_dirs": [], "vacuumed": False}
+        if not db_path.exists():
+            return result
+
+        with tracer.span("maintenance.compact") as span:
+            retired = set()
+            if self._rebuild_pending and not self.is_busy():
+                retired = set(self.rebuild_library())
+                self._rebuild_pending = False
+                result["rebuilt"] = True
+
+            conn = sqlite3.connect(str(db_path), timeout=5)
+            try:
+                live = {row[0] for row in conn.execute("SELECT id FROM segments")}
+                cutoff = time.time() - ORPHAN_MIN_AGE_SECONDS
+                for path in self.chroma_dir.iterdir():
+                    if not (path.is_dir() and SEGMENT_DIR_RE.match(path.name)) or path.name in live:
+                        continue
+                    # Directories of the just-retired library need not age first
+                    if path.name in retired or path.stat().st_mtime < cutoff:
+                        shutil.rmtree(path, ignore_errors=True)
+                        result["removed_segment_dirs"].append(path.name)
+                # VACUUM holds an exclusive lock that would block ingest writes
+                if not self.is_busy():
+                    try:
+                        conn.execute("VACUUM")
+                        result["vacuumed"] = True
+                    except sqlite3.OperationalError:
+                        pass
+            finally:
+                conn.close()
+            span["rebuilt"] = result["rebuilt"]
+            span["removed_segment_dirs"] = len(result["removed_segment_dirs"])
+            span["vacuumed"] = result["vacuumed"]
+        return result
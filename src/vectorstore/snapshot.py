@@ -0,0 +1,257 @@
+"""
+Portable snapshots of the document library.
+
+A snapshot is a directory holding:
+- manifest.json: format version, embedding model identity, file checksums
+- vectors.npy: float32 embeddings, memory-mapped on load
+- chunks.jsonl: chunk ids, texts and metadata, one per line
+- keyword_index.json: the partitioned BM25 postings, so nothing is re-tokenized
+
+Importing a snapshot restores the library without re-fetching, re-parsing
+or re-embedding anything, and is refused if it was built with a different
+embedding model.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config.settings import (
+    EMBEDDING_MODEL_NAME,
+    LIBRARY_COLLECTION,
+    SNAPSHOT_DIR,
+    SNAPSHOT_BATCH_SIZE
+)
+from src.rag.keyword_index import PartitionedBM25Index
+from src.vectorstore.chroma_manager import (
+    bump_library_generation,
+    get_chroma_client,
+    get_library_vectorstore
+)
+from src.utils.tracing import tracer
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+CHUNKS = "chunks.jsonl"
+KEYWORD_INDEX = "keyword_index.json"
+
+
+def file_sha256(path) -> str:
+    """Hash a file in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(path):
+    """
+    Read a snapshot's manifest.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        Manifest dict
+    """
+    try:
+        with open(Path(path) / MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception(f"Not a valid snapshot: {path} ({e})")
+
+
+def list_snapshots(root=SNAPSHOT_DIR):
+    """
+    List the snapshots stored under root, newest first.
+
+    Returns:
+        List of (path, manifest) tuples
+    """
+    root = Path(root)
+    if not root.exists():
+        return []
+    snapshots = []
+    for path in root.iterdir():
+        if (path / MANIFEST).exists():
+            try:
+                snapshots.append((path, read_manifest(path)))
+            except Exception:
+                continue
+    return sorted(snapshots, key=lambda item: item[1].get("created_at", 0), reverse=True)
+
+
+def export_snapshot(destination=None, model_name=EMBEDDING_MODEL_NAME):
+    """
+    Write the library collection to a snapshot directory.
+
+    Args:
+        destination: Snapshot directory, defaults to a timestamped one under SNAPSHOT_DIR
+        model_name: Identity of the embedding model that produced the vectors
+
+    Returns:
+        Path of the snapshot
+    """
+    collection = get_chroma_client().get_or_create_collection(LIBRARY_COLLECTION)
+    count = collection.count()
+    if not count:
+        raise Exception("The library is empty, nothing to export.")
+
+    destination = Path(destination or SNAPSHOT_DIR / time.strftime("%Y%m%d-%H%M%S"))
+    if destination.exists():
+        raise Exception(f"Snapshot already exists: {destination}")
+    tmp_dir = destination.with_name(destination.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    try:
+        with tracer.span("snapshot.export", chunks=count) as span:
+            vectors = None
+            chunks = []
+            with open(tmp_dir / CHUNKS, "w", encoding="utf-8") as f:
+                for offset in range(0, count, SNAPSHOT_BATCH_SIZE):
+                    batch = collection.get(
+                        limit=SNAPSHOT_BATCH_SIZE,
+                        offset=offset,
+                        include=["embeddings", "documents", "metadatas"]
+                    )
+                    embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+                    if vectors is None:
+                        vectors = np.lib.format.open_memmap(
+                            tmp_dir / VECTORS, mode="w+", dtype=np.float32,
+                            shape=(count, embeddings.shape[1])
+                        )
+                    vectors[offset:offset + len(embeddings)] = embeddings
+
+                    for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                        metadata = metadata or {}
+                        f.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+                        chunks.append(Document(page_content=text, metadata=metadata))
+
+            if len(chunks) != count:
+                raise Exception("The library changed during export, try again.")
+            dimension = vectors.shape[1]
+            vectors.flush()
+            del vectors
+
+            # Tokenize once here so importers only load postings
+            rows = {id(doc): row for row, doc in enumerate(chunks)}
+            index = PartitionedBM25Index(chunks)
+            with open(tmp_dir / KEYWORD_INDEX, "w", encoding="utf-8") as f:
+                json.dump(index.to_dict(lambda doc: rows[id(doc)]), f)
+
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "created_at": time.time(),
+                "embedding_model": model_name,
+                "embedding_dim": int(dimension),
+                "chunks": count,
+                "sources": index.sources(),
+                "files": {
+                    name: file_sha256(tmp_dir / name)
+                    for name in (VECTORS, CHUNKS, KEYWORD_INDEX)
+                },
+            }
+            with open(tmp_dir / MANIFEST, "w") as f:
+                json.dump(manifest, f, indent=2)
+            span["bytes"] = sum(os.path.getsize(tmp_dir / name) for name in manifest["files"])
+
+        os.replace(tmp_dir, destination)
+        return destination
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def check_compatible(manifest, embedding_model, model_name=EMBEDDING_MODEL_NAME):
+    """
+    Refuse snapshots from another format version or embedding model.
+
+    Raises:
+        Exception describing the mismatch
+    """
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise Exception(
+            f"Unsupported snapshot format {manifest.get('format_version')}, expected {FORMAT_VERSION}."
+        )
+    if manifest.get("embedding_model") != model_name:
+        raise Exception(
+            f"Snapshot was built with {manifest.get('embedding_model')}, "
+            f"but this app uses {model_name}. Re-ingest the documents instead."
+        )
+    dimension = len(embedding_model.embed_query("snapshot dimension check"))
+    if manifest.get("embedding_dim") != dimension:
+        raise Exception(
+            f"Snapshot vectors have {manifest.get('embedding_dim')} dimensions, "
+            f"but the embedding model produces {dimension}."
+        )
+
+
+def import_snapshot(path, embedding_model, model_name=EMBEDDING_MODEL_NAME, verify=True):
+    """
+    Replace the library collection with the contents of a snapshot.
+
+    The library is dropped and recreated, which bumps the library generation:
+    other sessions reload and running jobs reopen the new collection.
+
+    Args:
+        path: Snapshot directory
+        embedding_model: Embedding model used for queries
+        model_name: Identity of that embedding model
+        verify: Check file checksums before loading
+
+    Returns:
+        tuple: (vector_store, document_chunks, keyword_index)
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    check_compatible(manifest, embedding_model, model_name)
+
+    with tracer.span("snapshot.import", chunks=manifest.get("chunks")) as span:
+        if verify:
+            for name, checksum in manifest["files"].items():
+                if file_sha256(path / name) != checksum:
+                    raise Exception(f"Snapshot file {name} is corrupted (checksum mismatch).")
+
+        vectors = np.load(path / VECTORS, mmap_mode="r")
+        ids, chunks = [], []
+        with open(path / CHUNKS, encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                ids.append(item["id"])
+                chunks.append(Document(page_content=item["text"], metadata=item["metadata"]))
+        if vectors.shape != (len(chunks), manifest["embedding_dim"]):
+            raise Exception("Snapshot vectors do not match its chunks.")
+
+        with open(path / KEYWORD_INDEX, encoding="utf-8") as f:
+            keyword_index = PartitionedBM25Index.from_dict(json.load(f), chunks)
+
+        # Recreating is much faster than deleting rows, but invalidates every
+        # open handle on the old collection; the generation bump tells their
+        # holders to reopen it
+        client = get_chroma_client()
+        if client.get_or_create_collection(LIBRARY_COLLECTION).count():
+            try:
+                client.delete_collection(LIBRARY_COLLECTION)
+            finally:
+                bump_library_generation()
+        collection = client.get_or_create_collection(LIBRARY_COLLECTION)
+
+        for start in range(0, len(chunks), SNAPSHOT_BATCH_SIZE):
+            stop = start + SNAPSHOT_BATCH_SIZE
+            collection.add(
+                ids=ids[start:stop],
+                embeddings=vectors[start:stop].tolist(),
+                documents=[c.page_content for c in chunks[start:stop]],
+                metadatas=[c.metadata for c in chunks[start:stop]]
+            )
+        span["sources"] = len(keyword_index.sources())
+
+    return get_library_vectorstore(embedding_model), chunks, keyword_index